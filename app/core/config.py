@@ -11,6 +11,30 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4o-mini"
     cors_origins: str = "http://localhost:3000,http://127.0.0.1:3000"
     cors_origin_regex: str | None = r"^https?://(localhost|127\.0\.0\.1|\[::1\])(:\d+)?$"
+    analytics_backend: str = "rollup"  # rollup | sql
+    analytics_cache_max_entries: int = 1024
+    analytics_cache_max_bytes: int = 32 * 1024 * 1024
+    analytics_cache_ttl_seconds: int = 300
+    forecast_cache_max_entries: int = 4096
+    forecast_cache_max_bytes: int = 16 * 1024 * 1024
+    forecast_cache_ttl_seconds: int = 24 * 60 * 60
+    forecast_pool_workers: int = 2  # 0 fits in the request thread
+    forecast_pool_max_queue: int = 16
+    forecast_fit_timeout_seconds: float = 10.0
+    backtest_max_folds: int = 6
+    forecast_interval_paths: int = 2000
+    scenario_paths: int = 10_000
+    forecast_batch_workers: int | None = None  # None: one per CPU, in-process on a single CPU
+    forecast_batch_chunk_users: int = 200
+    upload_chunk_rows: int = 50_000
+    upload_copy_enabled: bool = True  # COPY FROM STDIN bulk load on PostgreSQL
+    transaction_batch_max_items: int = 5_000
+    transaction_batch_item_bytes: int = 1_024  # body cap: max items * this
+    export_batch_rows: int = 50_000
+    upload_job_dir: str = "./uploads"
+    upload_job_workers: int = 2
+    upload_job_lease_seconds: int = 300  # a running job without progress for this long may be taken over
+    warmup_on_startup: bool = False  # preload heavy libraries in the background after startup
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
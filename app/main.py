@@ -1,9 +1,16 @@
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.database import Base, engine
+from app.database import Base, SessionLocal, engine, upgrade_schema
 from app.routers import auth, chat, dashboard, insights, predictions, transactions, users
+from app.services import forecast_pool
+from app.services.cache import CACHES
+from app.services.ingestion_jobs import resume_pending_jobs, shutdown_workers
+from app.services.rollup import backfill_rollup
+from app.services.warmup import start_warmup, warmup_state
 
 app = FastAPI(title=settings.app_name, version="0.1.0")
 
@@ -22,6 +29,18 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    with SessionLocal() as db:
+        backfill_rollup(db)
+    resume_pending_jobs()
+    if settings.warmup_on_startup:
+        start_warmup()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    shutdown_workers()
+    forecast_pool.shutdown()
 
 
 @app.get("/", tags=["Health"])
@@ -29,6 +48,21 @@ def root() -> dict[str, str]:
     return {"message": "Unfinial AI API is running"}
 
 
+@app.get("/health/cache", tags=["Health"])
+def cache_stats() -> dict[str, dict[str, int | float]]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
+
+
+@app.get("/health/forecast-pool", tags=["Health"])
+def forecast_pool_stats() -> dict[str, Any]:
+    return forecast_pool.stats()
+
+
+@app.get("/health/warmup", tags=["Health"])
+def warmup_status() -> dict[str, Any]:
+    return warmup_state()
+
+
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(transactions.router)
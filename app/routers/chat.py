@@ -5,13 +5,8 @@ from app.database import get_db
 from app.deps import get_current_user
 from app.models import User
 from app.schemas import ChatRequest, ChatRequestMe, ChatResponse
-from app.services.analytics import (
-    dashboard_summary,
-    expense_intelligence,
-    financial_health_score,
-    load_user_transactions_df,
-)
 from app.services.chatbot import generate_finance_answer
+from app.services.engine import user_analytics
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -22,16 +17,13 @@ def finance_chat(payload: ChatRequest, db: Session = Depends(get_db)) -> ChatRes
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
-    df = load_user_transactions_df(db, payload.user_id)
-    summary = dashboard_summary(df)
-    score = financial_health_score(df)
-    expense = expense_intelligence(df)
+    analytics = user_analytics(db, payload.user_id)
 
     answer = generate_finance_answer(
         question=payload.question,
-        summary=summary,
-        health_score=score,
-        expense_insight=expense,
+        summary=analytics["summary"],
+        health_score=analytics["health_score"],
+        expense_insight=analytics["expense_intelligence"],
     )
     return ChatResponse(answer=answer)
 
@@ -42,15 +34,12 @@ def finance_chat_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> ChatResponse:
-    df = load_user_transactions_df(db, current_user.id)
-    summary = dashboard_summary(df)
-    score = financial_health_score(df)
-    expense = expense_intelligence(df)
+    analytics = user_analytics(db, current_user.id)
 
     answer = generate_finance_answer(
         question=payload.question,
-        summary=summary,
-        health_score=score,
-        expense_insight=expense,
+        summary=analytics["summary"],
+        health_score=analytics["health_score"],
+        expense_insight=analytics["expense_intelligence"],
     )
     return ChatResponse(answer=answer)
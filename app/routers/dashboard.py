@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.deps import get_current_user
 from app.models import User
-from app.schemas import SummaryResponse
-from app.services.analytics import dashboard_summary, load_user_transactions_df
+from app.schemas import BatchSummaryRequest, BatchSummaryResponse, SummaryResponse, UserSummaryItem
+from app.services.engine import batch_dashboard_summaries, user_dashboard_summary
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -17,8 +18,7 @@ def get_summary_me(
     db: Session = Depends(get_db),
 ) -> SummaryResponse:
     months = max(1, min(months, 24))
-    df = load_user_transactions_df(db, current_user.id)
-    summary = dashboard_summary(df, months=months)
+    summary = user_dashboard_summary(db, current_user.id, months=months)
     return SummaryResponse(**summary)
 
 
@@ -29,6 +29,26 @@ def get_summary(user_id: int, months: int = 12, db: Session = Depends(get_db)) -
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
     months = max(1, min(months, 24))
-    df = load_user_transactions_df(db, user_id)
-    summary = dashboard_summary(df, months=months)
+    summary = user_dashboard_summary(db, user_id, months=months)
     return SummaryResponse(**summary)
+
+
+@router.post("/summary/batch", response_model=BatchSummaryResponse)
+def get_summary_batch(payload: BatchSummaryRequest, db: Session = Depends(get_db)) -> BatchSummaryResponse:
+    months = max(1, min(payload.months, 24))
+    requested = sorted(set(payload.user_ids))
+    total_pages = (len(requested) + payload.page_size - 1) // payload.page_size
+    page_ids = requested[(payload.page - 1) * payload.page_size : payload.page * payload.page_size]
+
+    existing = set(db.scalars(select(User.id).where(User.id.in_(page_ids))).all()) if page_ids else set()
+    found_ids = [user_id for user_id in page_ids if user_id in existing]
+    summaries = batch_dashboard_summaries(db, found_ids, months=months)
+
+    return BatchSummaryResponse(
+        items=[UserSummaryItem(user_id=user_id, summary=SummaryResponse(**summaries[user_id])) for user_id in found_ids],
+        missing_user_ids=[user_id for user_id in page_ids if user_id not in existing],
+        page=payload.page,
+        page_size=payload.page_size,
+        total_users=len(requested),
+        total_pages=total_pages,
+    )
@@ -5,7 +5,7 @@ from app.database import get_db
 from app.deps import get_current_user
 from app.models import User
 from app.schemas import ExpenseIntelligenceResponse, HealthScoreResponse
-from app.services.analytics import expense_intelligence, financial_health_score, load_user_transactions_df
+from app.services.engine import user_analytics
 
 router = APIRouter(prefix="/insights", tags=["Insights"])
 
@@ -15,8 +15,7 @@ def get_health_score_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> HealthScoreResponse:
-    df = load_user_transactions_df(db, current_user.id)
-    score = financial_health_score(df)
+    score = user_analytics(db, current_user.id)["health_score"]
     return HealthScoreResponse(**score)
 
 
@@ -26,8 +25,7 @@ def get_health_score(user_id: int, db: Session = Depends(get_db)) -> HealthScore
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
-    df = load_user_transactions_df(db, user_id)
-    score = financial_health_score(df)
+    score = user_analytics(db, user_id)["health_score"]
     return HealthScoreResponse(**score)
 
 
@@ -36,8 +34,7 @@ def get_expense_intelligence_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> ExpenseIntelligenceResponse:
-    df = load_user_transactions_df(db, current_user.id)
-    result = expense_intelligence(df)
+    result = user_analytics(db, current_user.id)["expense_intelligence"]
     return ExpenseIntelligenceResponse(**result)
 
 
@@ -47,6 +44,5 @@ def get_expense_intelligence(user_id: int, db: Session = Depends(get_db)) -> Exp
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
-    df = load_user_transactions_df(db, user_id)
-    result = expense_intelligence(df)
+    result = user_analytics(db, user_id)["expense_intelligence"]
     return ExpenseIntelligenceResponse(**result)
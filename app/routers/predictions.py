@@ -3,86 +3,109 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.deps import get_current_user
-from app.models import Prediction, User
-from app.schemas import PredictionPoint, PredictionResponse
-from app.services.analytics import load_user_transactions_df
-from app.services.prediction import predict_cash_flow
+from app.models import User
+from app.schemas import ForecastMetrics, PredictionPoint, PredictionResponse, ScenarioRequest, ScenarioResponse
+from app.services.engine import user_auto_forecast, user_cash_flow_forecast, user_scenario
+from app.services.prediction import INTERVALS_UNAVAILABLE
+from app.services.scenario import Scenario
 
 router = APIRouter(prefix="/predictions", tags=["Predictions"])
 
 
-@router.get("/cash-flow", response_model=PredictionResponse)
-def cash_flow_prediction_me(
-    months: int = 6,
-    model: str = "linear",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> PredictionResponse:
-    if model not in {"linear", "arima"}:
-        raise HTTPException(status_code=400, detail="Model harus 'linear' atau 'arima'.")
+def _cash_flow_prediction(db: Session, user_id: int, months: int, model: str, intervals: bool) -> PredictionResponse:
+    if model not in {"linear", "arima", "auto"}:
+        raise HTTPException(status_code=400, detail="Model harus 'linear', 'arima', atau 'auto'.")
 
-    df = load_user_transactions_df(db, current_user.id)
+    metrics = None
     try:
-        used_model, points, deficit_risk = predict_cash_flow(df, horizon_months=months, model=model)
+        if model == "auto":
+            used_model, points, deficit_risk, selection = user_auto_forecast(
+                db, user_id, horizon_months=months, intervals=intervals
+            )
+            metrics = ForecastMetrics(**selection.as_dict())
+        else:
+            used_model, points, deficit_risk = user_cash_flow_forecast(
+                db, user_id, horizon_months=months, model=model, intervals=intervals
+            )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    rows = [
-        Prediction(
-            user_id=current_user.id,
-            month=point["month"],
-            predicted_value=point["predicted_cash_flow"],
-            model_type=used_model,
-        )
-        for point in points
-    ]
-    db.add_all(rows)
+    # History prediksi hanya ditulis jika hasilnya berubah (lihat prediction_history).
     db.commit()
 
+    intervals_message = None
+    if intervals and points and "p10" not in points[0]:
+        intervals_message = INTERVALS_UNAVAILABLE
+
     return PredictionResponse(
         model_used=used_model,
         horizon_months=months,
         deficit_risk_months=deficit_risk,
         points=[PredictionPoint(**point) for point in points],
+        metrics=metrics,
+        intervals_message=intervals_message,
     )
 
 
+@router.get("/cash-flow", response_model=PredictionResponse)
+def cash_flow_prediction_me(
+    months: int = 6,
+    model: str = "linear",
+    intervals: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> PredictionResponse:
+    return _cash_flow_prediction(db, current_user.id, months, model, intervals)
+
+
 @router.get("/cash-flow/{user_id}", response_model=PredictionResponse)
 def cash_flow_prediction(
     user_id: int,
     months: int = 6,
     model: str = "linear",
+    intervals: bool = False,
     db: Session = Depends(get_db),
 ) -> PredictionResponse:
     user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
-    if model not in {"linear", "arima"}:
-        raise HTTPException(status_code=400, detail="Model harus 'linear' atau 'arima'.")
+    return _cash_flow_prediction(db, user_id, months, model, intervals)
+
+
+def _scenario(db: Session, user_id: int, payload: ScenarioRequest) -> ScenarioResponse:
+    one_off_expenses: dict[int, float] = {}
+    for expense in payload.one_off_expenses:
+        one_off_expenses[expense.month] = one_off_expenses.get(expense.month, 0.0) + expense.amount
+    scenario = Scenario(
+        horizon_months=payload.months,
+        revenue_change_pct=payload.revenue_change_pct,
+        expense_change_pct=payload.expense_change_pct,
+        category_changes={change.category.strip(): change.change_pct for change in payload.category_changes},
+        one_off_expenses=one_off_expenses,
+        starting_cash=payload.starting_cash,
+    )
 
-    df = load_user_transactions_df(db, user_id)
     try:
-        used_model, points, deficit_risk = predict_cash_flow(df, horizon_months=months, model=model)
+        result = user_scenario(db, user_id, scenario)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return ScenarioResponse(**result)
 
-    # Simpan history prediksi per request.
-    rows = [
-        Prediction(
-            user_id=user_id,
-            month=point["month"],
-            predicted_value=point["predicted_cash_flow"],
-            model_type=used_model,
-        )
-        for point in points
-    ]
-    db.add_all(rows)
-    db.commit()
 
-    return PredictionResponse(
-        model_used=used_model,
-        horizon_months=months,
-        deficit_risk_months=deficit_risk,
-        points=[PredictionPoint(**point) for point in points],
-    )
+@router.post("/scenarios", response_model=ScenarioResponse)
+def cash_flow_scenario_me(
+    payload: ScenarioRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> ScenarioResponse:
+    return _scenario(db, current_user.id, payload)
+
+
+@router.post("/scenarios/{user_id}", response_model=ScenarioResponse)
+def cash_flow_scenario(user_id: int, payload: ScenarioRequest, db: Session = Depends(get_db)) -> ScenarioResponse:
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan.")
+
+    return _scenario(db, user_id, payload)
@@ -1,35 +1,44 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from datetime import date
-from io import BytesIO
 
-import pandas as pd
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.lazy import lazy_module
 from app.database import get_db
 from app.deps import get_current_user
-from app.models import Transaction, User
-from app.schemas import TransactionCreate, TransactionCreateMe, TransactionRead, UploadResponse
+from app.models import IngestionJob, Transaction, User
+from app.schemas import (
+    TransactionBatchItemResult,
+    TransactionBatchResponse,
+    TransactionCreate,
+    TransactionCreateMe,
+    TransactionRead,
+    UploadJobRead,
+    UploadResponse,
+)
+from app.services.export import iter_transactions_parquet
+from app.services.ingestion import (
+    IngestResult,
+    UploadError,
+    ingest_file,
+    insert_transaction_records,
+    record_inserted,
+)
+from app.services.ingestion_jobs import create_job, submit_job
+
+pd = lazy_module("pandas")
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
-TYPE_ALIAS = {
-    "income": "income",
-    "expense": "expense",
-    "pendapatan": "income",
-    "pemasukan": "income",
-    "pengeluaran": "expense",
-    "beban": "expense",
-}
-
-
-def _normalize_type(raw: str) -> str | None:
-    if raw is None:
-        return None
-    return TYPE_ALIAS.get(str(raw).strip().lower())
-
 
 def _validate_user(db: Session, user_id: int) -> None:
     user = db.get(User, user_id)
@@ -37,61 +46,150 @@ def _validate_user(db: Session, user_id: int) -> None:
         raise HTTPException(status_code=404, detail="User tidak ditemukan.")
 
 
-def _read_upload_frame(raw: bytes, filename: str) -> pd.DataFrame:
-    lower = (filename or "").lower()
-    if lower.endswith(".csv"):
-        return pd.read_csv(BytesIO(raw))
-    if lower.endswith(".xlsx"):
-        return pd.read_excel(BytesIO(raw))
-    raise HTTPException(status_code=400, detail="File harus .csv atau .xlsx")
-
+def _record_one(db: Session, tx: Transaction) -> None:
+    row = pd.DataFrame([{"date": tx.date, "type": tx.type, "category": tx.category, "amount": float(tx.amount)}])
+    record_inserted(db, tx.user_id, row)
 
-def _insert_from_frame(db: Session, user_id: int, frame: pd.DataFrame) -> tuple[int, int]:
-    frame.columns = [str(col).strip().lower() for col in frame.columns]
-    required = {"date", "type", "category", "amount"}
-    if not required.issubset(set(frame.columns)):
-        raise HTTPException(status_code=400, detail="Kolom wajib: date, type, category, amount")
 
-    inserted = 0
-    skipped = 0
-    objects: list[Transaction] = []
+def _error_messages(exc: ValidationError) -> list[str]:
+    return [": ".join(filter(None, (".".join(map(str, err["loc"])), err["msg"]))) for err in exc.errors()]
 
-    for row in frame.to_dict(orient="records"):
-        normalized = _normalize_type(row.get("type"))
-        if normalized not in {"income", "expense"}:
-            skipped += 1
-            continue
 
+def _validate_item(raw: object) -> TransactionCreateMe | list[str]:
+    """Validate one NDJSON line (bytes) or decoded array element."""
+    try:
+        if isinstance(raw, bytes):
+            return TransactionCreateMe.model_validate_json(raw)
+        return TransactionCreateMe.model_validate(raw)
+    except ValidationError as exc:
+        return _error_messages(exc)
+
+
+async def _limited_stream(request: Request, max_bytes: int, too_large: HTTPException) -> AsyncIterator[bytes]:
+    """The request body in chunks; `too_large` as soon as it exceeds `max_bytes`, before the rest is read."""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise too_large
+        yield chunk
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    yield pending
+
+
+async def _read_batch_items(
+    request: Request, max_items: int, item_bytes: int
+) -> list[TransactionCreateMe | list[str]]:
+    too_many = HTTPException(status_code=413, detail=f"Maksimal {max_items} transaksi per batch.")
+    max_bytes = max_items * item_bytes
+    too_large = HTTPException(status_code=413, detail=f"Body batch maksimal {max_bytes} byte.")
+    body = _limited_stream(request, max_bytes, too_large)
+    items: list[TransactionCreateMe | list[str]] = []
+
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        async for line in _ndjson_lines(body):
+            if not line.strip():
+                continue
+            if len(items) == max_items:
+                raise too_many
+            items.append(_validate_item(line))
+    else:
         try:
-            amount = float(row.get("amount"))
-            tx_date = pd.to_datetime(row.get("date")).date()
-            category = str(row.get("category")).strip()
+            payload = json.loads(b"".join([chunk async for chunk in body]))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Body harus berupa JSON array atau NDJSON.") from exc
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body harus berupa JSON array atau NDJSON.")
+        if len(payload) > max_items:
+            raise too_many
+        items = [_validate_item(item) for item in payload]
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch tidak berisi transaksi.")
+    return items
+
+
+def _create_batch(db: Session, user_id: int, items: list[TransactionCreateMe | list[str]]) -> TransactionBatchResponse:
+    valid = [index for index, item in enumerate(items) if isinstance(item, TransactionCreateMe)]
+    ids = insert_transaction_records(db, user_id, [items[index].model_dump() for index in valid])
+    db.commit()
 
-            if amount <= 0 or not category:
-                skipped += 1
-                continue
-        except Exception:
-            skipped += 1
-            continue
-
-        note = row.get("note")
-        objects.append(
-            Transaction(
-                user_id=user_id,
-                type=normalized,
-                category=category,
-                amount=amount,
-                date=date(tx_date.year, tx_date.month, tx_date.day),
-                note=str(note) if note is not None else None,
-            )
+    created = dict(zip(valid, ids))
+    results = [
+        TransactionBatchItemResult(index=index, status="created", id=created[index])
+        if index in created
+        else TransactionBatchItemResult(index=index, status="invalid", errors=item)
+        for index, item in enumerate(items)
+    ]
+    return TransactionBatchResponse(
+        received=len(items),
+        created=len(ids),
+        invalid=len(items) - len(ids),
+        items=results,
+    )
+
+
+def _upload_message(progress: IngestResult) -> str:
+    if progress.already_ingested:
+        message = f"File ini sudah pernah diupload. 0 baris masuk, {progress.duplicates} baris duplikat dilewati."
+        if progress.skipped:
+            message += f" {progress.skipped} baris tidak valid dilewati."
+        return message
+    message = f"Upload selesai. {progress.inserted} baris masuk, {progress.skipped} baris dilewati."
+    if progress.duplicates:
+        message += f" {progress.duplicates} baris duplikat tidak dimasukkan lagi."
+    return message
+
+
+def _ingest_upload(db: Session, user_id: int, file: UploadFile, sheet: str | None) -> UploadResponse:
+    progress = IngestResult()
+    try:
+        ingest_file(
+            db,
+            user_id,
+            file.file,
+            file.filename or "",
+            settings.upload_chunk_rows,
+            result=progress,
+            sheet=sheet,
         )
-        inserted += 1
+    except UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        detail = f"Gagal memproses file: {exc}"
+        if progress.inserted:
+            detail += f" ({progress.inserted} baris dari {progress.chunks} chunk pertama sudah tersimpan)"
+        raise HTTPException(status_code=400, detail=detail) from exc
 
-    if objects:
-        db.add_all(objects)
-        db.commit()
+    return UploadResponse(
+        inserted_rows=progress.inserted,
+        skipped_rows=progress.skipped,
+        duplicate_rows=progress.duplicates,
+        rows_read=progress.rows_read,
+        chunks_processed=progress.chunks,
+        message=_upload_message(progress),
+    )
 
-    return inserted, skipped
+
+def _queue_upload(db: Session, user_id: int, file: UploadFile, sheet: str | None) -> IngestionJob:
+    try:
+        job = create_job(db, user_id, file.file, file.filename or "", sheet)
+    except UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    submit_job(job.id)
+    return job
 
 
 @router.post("/manual", response_model=TransactionRead, status_code=status.HTTP_201_CREATED)
@@ -107,6 +205,7 @@ def create_transaction(payload: TransactionCreate, db: Session = Depends(get_db)
         note=payload.note,
     )
     db.add(tx)
+    _record_one(db, tx)
     db.commit()
     db.refresh(tx)
     return tx
@@ -127,11 +226,24 @@ def create_transaction_me(
         note=payload.note,
     )
     db.add(tx)
+    _record_one(db, tx)
     db.commit()
     db.refresh(tx)
     return tx
 
 
+@router.post("/batch", response_model=TransactionBatchResponse)
+async def create_transactions_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> TransactionBatchResponse:
+    items = await _read_batch_items(
+        request, settings.transaction_batch_max_items, settings.transaction_batch_item_bytes
+    )
+    return await run_in_threadpool(_create_batch, db, current_user.id, items)
+
+
 @router.get("", response_model=list[TransactionRead])
 def list_transactions_me(
     limit: int = 50,
@@ -154,47 +266,78 @@ def list_transactions_me(
     return db.scalars(stmt).all()
 
 
+@router.get("/export.parquet")
+def export_transactions_me(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    return StreamingResponse(
+        iter_transactions_parquet(current_user.id, settings.export_batch_rows, start_date, end_date),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f'attachment; filename="transactions-{current_user.id}.parquet"'},
+    )
+
+
 @router.post("/upload", response_model=UploadResponse)
-async def upload_transactions(
+def upload_transactions(
     user_id: int,
     file: UploadFile = File(...),
+    sheet: str | None = None,
     db: Session = Depends(get_db),
 ) -> UploadResponse:
     _validate_user(db, user_id)
-
-    raw = await file.read()
-    try:
-        frame = _read_upload_frame(raw, file.filename or "")
-        inserted, skipped = _insert_from_frame(db, user_id=user_id, frame=frame)
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Gagal memproses file: {exc}") from exc
-
-    return UploadResponse(
-        inserted_rows=inserted,
-        skipped_rows=skipped,
-        message=f"Upload selesai. {inserted} baris masuk, {skipped} baris dilewati.",
-    )
+    return _ingest_upload(db, user_id, file, sheet)
 
 
 @router.post("/upload/me", response_model=UploadResponse)
-async def upload_transactions_me(
+def upload_transactions_me(
     file: UploadFile = File(...),
+    sheet: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> UploadResponse:
-    raw = await file.read()
-    try:
-        frame = _read_upload_frame(raw, file.filename or "")
-        inserted, skipped = _insert_from_frame(db, user_id=current_user.id, frame=frame)
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=400, detail=f"Gagal memproses file: {exc}") from exc
+    return _ingest_upload(db, current_user.id, file, sheet)
 
-    return UploadResponse(
-        inserted_rows=inserted,
-        skipped_rows=skipped,
-        message=f"Upload selesai. {inserted} baris masuk, {skipped} baris dilewati.",
-    )
+
+@router.post("/upload/jobs", response_model=UploadJobRead, status_code=status.HTTP_202_ACCEPTED)
+def queue_upload(
+    user_id: int,
+    file: UploadFile = File(...),
+    sheet: str | None = None,
+    db: Session = Depends(get_db),
+) -> IngestionJob:
+    _validate_user(db, user_id)
+    return _queue_upload(db, user_id, file, sheet)
+
+
+@router.post("/upload/me/jobs", response_model=UploadJobRead, status_code=status.HTTP_202_ACCEPTED)
+def queue_upload_me(
+    file: UploadFile = File(...),
+    sheet: str | None = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> IngestionJob:
+    return _queue_upload(db, current_user.id, file, sheet)
+
+
+def _user_job(db: Session, user_id: int, job_id: int) -> IngestionJob:
+    job = db.get(IngestionJob, job_id)
+    # Jobs of other users are reported as missing, so IDs cannot be probed.
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Job upload tidak ditemukan.")
+    return job
+
+
+@router.get("/upload/jobs/{job_id}", response_model=UploadJobRead)
+def get_upload_job(job_id: int, user_id: int, db: Session = Depends(get_db)) -> IngestionJob:
+    return _user_job(db, user_id, job_id)
+
+
+@router.get("/upload/me/jobs/{job_id}", response_model=UploadJobRead)
+def get_upload_job_me(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> IngestionJob:
+    return _user_job(db, current_user.id, job_id)
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
@@ -60,6 +60,20 @@ class TransactionRead(BaseModel):
     note: str | None = None
 
 
+class TransactionBatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "invalid"]
+    id: int | None = None
+    errors: list[str] = Field(default_factory=list)
+
+
+class TransactionBatchResponse(BaseModel):
+    received: int
+    created: int
+    invalid: int
+    items: list[TransactionBatchItemResult]
+
+
 class MonthlyTrendPoint(BaseModel):
     month: date
     revenue: float
@@ -76,6 +90,27 @@ class SummaryResponse(BaseModel):
     insights: list[str]
 
 
+class BatchSummaryRequest(BaseModel):
+    user_ids: list[int] = Field(min_length=1, max_length=10_000)
+    months: int = 12
+    page: int = Field(default=1, ge=1)
+    page_size: int = Field(default=100, ge=1, le=500)
+
+
+class UserSummaryItem(BaseModel):
+    user_id: int
+    summary: SummaryResponse
+
+
+class BatchSummaryResponse(BaseModel):
+    items: list[UserSummaryItem]
+    missing_user_ids: list[int]
+    page: int
+    page_size: int
+    total_users: int
+    total_pages: int
+
+
 class HealthScoreResponse(BaseModel):
     health_score: float
     profit_margin_component: float
@@ -98,6 +133,17 @@ class ExpenseIntelligenceResponse(BaseModel):
 class PredictionPoint(BaseModel):
     month: date
     predicted_cash_flow: float
+    p10: float | None = None
+    p50: float | None = None
+    p90: float | None = None
+    deficit_probability: float | None = None
+
+
+class ForecastMetrics(BaseModel):
+    selected_model: str
+    folds: int
+    mae: dict[str, float]
+    fallback_from: str | None = None
 
 
 class PredictionResponse(BaseModel):
@@ -105,14 +151,79 @@ class PredictionResponse(BaseModel):
     horizon_months: int
     deficit_risk_months: int
     points: list[PredictionPoint]
+    metrics: ForecastMetrics | None = None
+    intervals_message: str | None = None
+
+
+class ScenarioCategoryChange(BaseModel):
+    category: str = Field(min_length=1, max_length=120)
+    change_pct: float = Field(ge=-100)
+
+
+class ScenarioOneOffExpense(BaseModel):
+    month: int = Field(ge=1, le=12)
+    amount: float = Field(gt=0)
+
+
+class ScenarioRequest(BaseModel):
+    months: int = Field(default=6, ge=3, le=12)
+    revenue_change_pct: float = Field(default=0.0, ge=-100)
+    expense_change_pct: float = Field(default=0.0, ge=-100)
+    category_changes: list[ScenarioCategoryChange] = Field(default_factory=list)
+    one_off_expenses: list[ScenarioOneOffExpense] = Field(default_factory=list)
+    starting_cash: float | None = None
+
+
+class ScenarioPoint(BaseModel):
+    month: date
+    p10: float
+    p50: float
+    p90: float
+    deficit_probability: float
+    balance_p10: float
+    balance_p50: float
+    balance_p90: float
+    cash_out_probability: float
+
+
+class ScenarioResponse(BaseModel):
+    scenario_hash: str
+    horizon_months: int
+    paths: int
+    starting_cash: float
+    runway_months: int | None
+    runway_p10_months: int | None
+    cash_out_probability: float
+    points: list[ScenarioPoint]
 
 
 class UploadResponse(BaseModel):
     inserted_rows: int
     skipped_rows: int
+    duplicate_rows: int = 0
+    rows_read: int = 0
+    chunks_processed: int = 0
     message: str
 
 
+class UploadJobRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    filename: str
+    status: Literal["queued", "running", "done", "failed"]
+    chunks: int
+    rows_read: int
+    inserted_rows: int
+    skipped_rows: int
+    duplicate_rows: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
 class ChatRequest(BaseModel):
     user_id: int
     question: str = Field(min_length=3, max_length=500)
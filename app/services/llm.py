@@ -2,8 +2,6 @@ from __future__ import annotations
 
 import json
 
-from openai import OpenAI
-
 from app.core.config import settings
 
 
@@ -25,6 +23,8 @@ def llm_finance_chat(
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY belum diset.")
 
+    from openai import OpenAI  # heavy SDK; only loaded when the LLM is actually used
+
     model = (settings.openai_model or "").strip() or "gpt-4o-mini"
     client = OpenAI(api_key=api_key)
 
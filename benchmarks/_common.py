@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base
+from app.models import Transaction, User
+
+DEFAULT_CATEGORIES = ["penjualan", "sewa", "gaji", "listrik", "bahan baku", "ongkir", "internet", "pajak"]
+
+
+def make_session(database_url: str) -> Session:
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, future=True, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def seed_user(db: Session, email: str = "bench@example.com") -> int:
+    user = User(name="Bench", email=email, password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def random_transaction_rows(
+    user_id: int,
+    rows: int,
+    categories: list[str] | None = None,
+    start: date = date(2021, 1, 1),
+    days: int = 3 * 365,
+    seed: int = 42,
+) -> list[dict[str, Any]]:
+    rnd = random.Random(seed)
+    categories = categories or DEFAULT_CATEGORIES
+    out = []
+    for _ in range(rows):
+        tx_type = "income" if rnd.random() < 0.45 else "expense"
+        out.append(
+            {
+                "user_id": user_id,
+                "type": tx_type,
+                "category": "penjualan" if tx_type == "income" else rnd.choice(categories),
+                "amount": round(rnd.uniform(5_000, 2_500_000), 2),
+                "date": start + timedelta(days=rnd.randrange(days)),
+                "note": None,
+            }
+        )
+    return out
+
+
+def seed_transactions(db: Session, user_id: int, rows: int, **kwargs: Any) -> None:
+    batch = 20_000
+    data = random_transaction_rows(user_id, rows, **kwargs)
+    for start in range(0, len(data), batch):
+        db.execute(insert(Transaction), data[start : start + batch])
+    db.commit()
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int = 3,
+    trace_memory: bool = True,
+    setup: Callable[[], Any] | None = None,
+) -> tuple[float, float, Any]:
+    """Return (best wall seconds, peak traced MiB, last result) over `repeat` runs.
+
+    The timed runs run untraced: tracemalloc slows allocation-heavy code far more
+    than the rest, which would skew comparisons. The peak comes from one extra
+    traced run, skipped (and reported as 0) without `trace_memory`. `setup`
+    runs untimed before every run, e.g. to empty a session's identity map.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    if not trace_memory:
+        return best, 0.0, result
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / (1024 * 1024), result
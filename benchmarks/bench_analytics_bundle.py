@@ -0,0 +1,57 @@
+"""Compare three separate analytics calls with one shared AnalyticsBundle.
+
+Usage (from the backend root):
+
+    python -m benchmarks.bench_analytics_bundle --rows 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics import build_analytics, dashboard_summary, expense_intelligence, financial_health_score
+from benchmarks._common import DEFAULT_CATEGORIES, measure
+
+
+def synthetic_transactions(rows: int, categories: list[str], seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    is_income = rng.random(rows) < 0.45
+    expense_category = rng.choice(np.array(categories, dtype=object), size=rows)
+    frame = pd.DataFrame(
+        {
+            "date": pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit="D"),
+            "type": pd.Categorical(np.where(is_income, "income", "expense")),
+            "category": pd.Categorical(np.where(is_income, "penjualan", expense_category)),
+            "amount": rng.uniform(5_000, 2_500_000, rows).round(2),
+        }
+    )
+    return frame.sort_values("date", ignore_index=True)
+
+
+def separate_calls(df: pd.DataFrame) -> dict:
+    return {
+        "summary": dashboard_summary(df),
+        "health_score": financial_health_score(df),
+        "expense_intelligence": expense_intelligence(df),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'separate s':>11} {'bundle s':>9} {'speedup':>8}")
+    for rows in args.rows:
+        df = synthetic_transactions(rows, DEFAULT_CATEGORIES)
+        separate_s, _, separate = measure(lambda: separate_calls(df), repeat=args.repeat, trace_memory=False)
+        bundle_s, _, bundled = measure(lambda: build_analytics(df), repeat=args.repeat, trace_memory=False)
+        assert separate == bundled, "bundle output differs from separate calls"
+        print(f"{rows:>9} {separate_s:>11.4f} {bundle_s:>9.4f} {separate_s / bundle_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Per-category loop vs vectorized expense_intelligence.
+
+Usage (from the backend root):
+
+    python -m benchmarks.bench_expense_intelligence --categories 10 100 1000 10000
+
+Output parity with the loop is covered by tests/test_expense_intelligence_parity.py.
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics import RecurringExpense, expense_intelligence
+from benchmarks._common import measure
+
+
+def expense_intelligence_loop(df: pd.DataFrame) -> dict:
+    """The previous implementation: one Python iteration per category."""
+    if df.empty:
+        return {"recurring_expenses": [], "recommendations": ["Belum ada data pengeluaran."]}
+
+    expenses = df[df["type"] == "expense"].copy()
+    if expenses.empty:
+        return {"recurring_expenses": [], "recommendations": ["Belum ada data expense."]}
+
+    expenses["month"] = expenses["date"].dt.to_period("M").dt.to_timestamp()
+    monthly_cat = (
+        expenses.groupby(["category", "month"], as_index=False, observed=True)["amount"].sum().sort_values(["category", "month"])
+    )
+
+    recurring_items: list[RecurringExpense] = []
+    recommendations: list[str] = []
+
+    for category, group in monthly_cat.groupby("category", observed=True):
+        months_active = int(group["month"].nunique())
+        avg_amount = float(group["amount"].mean())
+        std_amount = float(group["amount"].std(ddof=0)) if len(group) > 1 else 0.0
+        cv = std_amount / max(avg_amount, 1.0)
+
+        if months_active >= 3 and cv <= 0.5:
+            recurring_items.append(
+                RecurringExpense(category=category, average_monthly_amount=round(avg_amount, 2), active_months=months_active)
+            )
+
+        if months_active >= 3:
+            recent = group.sort_values("month")
+            latest = float(recent.iloc[-1]["amount"])
+            previous_avg = float(recent.iloc[:-1]["amount"].mean()) if len(recent) > 1 else latest
+            if previous_avg > 0:
+                jump_pct = ((latest - previous_avg) / previous_avg) * 100.0
+                if jump_pct >= 25:
+                    recommendations.append(
+                        f"Biaya kategori '{category}' naik {jump_pct:.1f}% dibanding rata-rata sebelumnya. Evaluasi kebutuhan kategori ini."
+                    )
+
+    recurring_items.sort(key=lambda x: x.average_monthly_amount, reverse=True)
+    top_recurring = recurring_items[:5]
+    if top_recurring:
+        recommendations.append(
+            f"Ada {len(top_recurring)} pengeluaran berulang dominan. Prioritaskan negosiasi vendor/langganan pada kategori dengan nilai terbesar."
+        )
+    if not recommendations:
+        recommendations.append("Struktur biaya cukup stabil, pertahankan monitoring bulanan.")
+
+    return {
+        "recurring_expenses": [item.__dict__ for item in top_recurring],
+        "recommendations": recommendations[:5],
+    }
+
+
+def synthetic_expenses(categories: int, rows_per_category: int, seed: int) -> pd.DataFrame:
+    """Expenses where some categories are steady, some jump in the last month, some are sparse."""
+    rng = np.random.default_rng(seed)
+    rows = categories * rows_per_category
+    category_ids = np.repeat(np.arange(categories), rows_per_category)
+    base = rng.uniform(50_000, 5_000_000, categories)[category_ids]
+    noise = rng.choice([0.05, 0.4, 1.2], categories)[category_ids]
+    month_offsets = rng.integers(0, rng.integers(1, 14, categories)[category_ids] + 1)
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(month_offsets * 30 + rng.integers(0, 28, rows), unit="D")
+    amounts = base * rng.lognormal(0.0, noise) * np.where(month_offsets >= 12, rng.uniform(1.0, 2.0, rows), 1.0)
+    # Mix in whole-valued and tiny amounts to exercise rounding and the max(avg, 1) guard.
+    amounts = np.where(rng.random(rows) < 0.05, np.round(amounts, -3), amounts)
+    amounts = np.where(rng.random(rows) < 0.01, rng.uniform(0.01, 2.0, rows), amounts)
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "type": pd.Categorical(np.where(rng.random(rows) < 0.9, "expense", "income")),
+            "category": pd.Categorical(np.char.add("kategori-", category_ids.astype(str))),
+            "amount": np.round(amounts, 2),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, nargs="+", default=[10, 100, 1_000, 10_000])
+    parser.add_argument("--rows-per-category", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'categories':>10} {'loop s':>9} {'vector s':>9} {'speedup':>8}")
+    for categories in args.categories:
+        df = synthetic_expenses(categories, args.rows_per_category, seed=categories)
+        loop_s, _, _ = measure(lambda: expense_intelligence_loop(df), repeat=args.repeat, trace_memory=False)
+        vector_s, _, _ = measure(lambda: expense_intelligence(df), repeat=args.repeat, trace_memory=False)
+        print(f"{categories:>10} {loop_s:>9.4f} {vector_s:>9.4f} {loop_s / vector_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Measure cold start: `import app.main` time and first-request latencies.
+
+Usage (from the backend root):
+
+    python -m benchmarks.bench_startup
+
+Each scenario runs in a fresh interpreter against a temporary SQLite file:
+
+- eager:  the heavy libraries are imported up front, as `app.main` used to do
+- lazy:   plain `import app.main`; libraries load on the request that needs them
+- warmup: lazy, plus `WARMUP_ON_STARTUP=true`; requests start once warm-up is done
+
+Requests, in order: register, login (no heavy library), the first transaction
+write (pandas), the dashboard summary and an ARIMA forecast (forecast pool
+workers and statsmodels).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("eager", "lazy", "warmup")
+EAGER_MODULES = ("numpy", "pandas", "pyarrow.parquet", "openpyxl", "openai", "statsmodels.tsa.arima.model")
+STEPS = ("import", "startup", "register", "login", "first_write", "dashboard", "forecast_arima")
+
+
+def _child(scenario: str) -> None:
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    if scenario == "eager":
+        import importlib
+
+        for module in EAGER_MODULES:
+            importlib.import_module(module)
+    import app.main
+
+    timings["import"] = time.perf_counter() - started
+
+    from fastapi.testclient import TestClient
+
+    def timed(step: str, call):
+        step_started = time.perf_counter()
+        response = call()
+        timings[step] = time.perf_counter() - step_started
+        return response
+
+    client = TestClient(app.main.app)
+    timed("startup", client.__enter__)
+    if scenario == "warmup":
+        while client.get("/health/warmup").json()["status"] != "done":
+            time.sleep(0.05)
+
+    user = {"name": "Bench", "email": "bench@example.com", "password": "secret1"}
+    user_id = timed("register", lambda: client.post("/users", json=user)).json()["id"]
+    timed("login", lambda: client.post("/auth/login", json={"email": user["email"], "password": user["password"]}))
+    timed(
+        "first_write",
+        lambda: client.post(
+            "/transactions/manual",
+            json={"user_id": user_id, "type": "income", "category": "penjualan", "amount": 1000, "date": "2024-01-05"},
+        ),
+    )
+    for month in range(2, 10):
+        client.post(
+            "/transactions/manual",
+            json={"user_id": user_id, "type": "expense", "category": "sewa", "amount": 300 * month, "date": f"2024-0{month}-05"},
+        )
+    timed("dashboard", lambda: client.get(f"/dashboard/summary/{user_id}"))
+    timed("forecast_arima", lambda: client.get(f"/predictions/cash-flow/{user_id}?months=6&model=arima"))
+    client.__exit__(None, None, None)
+    print(json.dumps(timings))
+
+
+def _run(scenario: str) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmpdir, 'bench.db')}",
+            "WARMUP_ON_STARTUP": "true" if scenario == "warmup" else "false",
+            "UPLOAD_JOB_DIR": os.path.join(tmpdir, "uploads"),
+        }
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", scenario],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child)
+        return
+
+    results = {scenario: _run(scenario) for scenario in args.scenarios}
+    print(f"{'step (ms)':>15} " + " ".join(f"{scenario:>9}" for scenario in results))
+    for step in STEPS:
+        print(f"{step:>15} " + " ".join(f"{timings[step] * 1000:>9.0f}" for timings in results.values()))
+
+
+if __name__ == "__main__":
+    main()
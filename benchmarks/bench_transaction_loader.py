@@ -0,0 +1,69 @@
+"""Compare the ORM-hydrating transaction loader with the columnar one.
+
+Usage (from the backend root):
+
+    python -m benchmarks.bench_transaction_loader --rows 200000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Transaction
+from app.services.analytics import load_user_transactions_df
+from benchmarks._common import make_session, measure, seed_transactions, seed_user
+
+
+def load_user_transactions_df_orm(db: Session, user_id: int) -> pd.DataFrame:
+    """The previous loader: full ORM objects -> list of dicts -> DataFrame."""
+    rows = db.scalars(
+        select(Transaction).where(Transaction.user_id == user_id).order_by(Transaction.date.asc())
+    ).all()
+    if not rows:
+        return pd.DataFrame(columns=["date", "type", "category", "amount"])
+    records = [
+        {
+            "date": pd.Timestamp(row.date),
+            "type": row.type,
+            "category": row.category,
+            "amount": float(row.amount),
+        }
+        for row in rows
+    ]
+    return pd.DataFrame(records)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file.")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = args.database_url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    db = make_session(url)
+
+    print(f"{'rows':>9} {'loader':>9} {'seconds':>9} {'peak MiB':>9} {'df MiB':>8}")
+    for index, rows in enumerate(args.rows):
+        user_id = seed_user(db, email=f"loader{index}@example.com")
+        seed_transactions(db, user_id, rows, seed=index)
+        for name, loader in (
+            ("orm", lambda: load_user_transactions_df_orm(db, user_id)),
+            ("columnar", lambda: load_user_transactions_df(db, user_id)),
+        ):
+            seconds, peak_mib, frame = measure(loader, repeat=args.repeat, setup=db.expunge_all)
+            frame_mib = frame.memory_usage(deep=True).sum() / (1024 * 1024)
+            print(f"{rows:>9} {name:>9} {seconds:>9.3f} {peak_mib:>9.1f} {frame_mib:>8.1f}")
+
+    db.close()
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
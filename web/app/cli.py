@@ -0,0 +1,119 @@
+"""Maintenance commands.
+
+    python -m app.cli rollup rebuild [--user-id N]
+    python -m app.cli rollup verify [--user-id N]
+    python -m app.cli forecast run [--workers N] [--chunk-users N] [--force]
+    python -m app.cli predictions compact [--keep-days N]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from app.core.config import settings
+from app.database import Base, SessionLocal, engine, upgrade_schema
+from app.services.forecast_batch import BatchForecastResult, run_batch_forecast
+from app.services.prediction_history import compact_prediction_history
+from app.services.rollup import rebuild_rollup, verify_rollup
+
+
+def _rollup_rebuild(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        written = rebuild_rollup(db, user_id=args.user_id)
+    print(f"Rollup dibangun ulang: {written} baris.")
+    return 0
+
+
+def _rollup_verify(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        drift = verify_rollup(db, user_id=args.user_id)
+    if not drift:
+        print("Rollup sesuai dengan data transaksi.")
+        return 0
+
+    print(f"Ditemukan {len(drift)} selisih rollup:")
+    for item in drift:
+        print(
+            f"  user={item.user_id} month={item.month:%Y-%m} type={item.type} category={item.category!r} "
+            f"amount {item.stored_amount:.2f} -> {item.actual_amount:.2f}, "
+            f"count {item.stored_count} -> {item.actual_count}"
+        )
+    return 1
+
+
+def _forecast_run(args: argparse.Namespace) -> int:
+    def report(result: BatchForecastResult, remaining: int) -> None:
+        print(f"  {result.users} user selesai, {remaining} tersisa ({result.users_per_second:.1f} user/detik)", flush=True)
+
+    workers = args.workers
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = cpus if cpus > 1 else 0
+
+    with SessionLocal() as db:
+        result = run_batch_forecast(db, workers, args.chunk_users, force=args.force, on_chunk=report)
+    print(
+        f"Forecast dihitung untuk {result.users} user ({result.forecasts} forecast, "
+        f"{result.insufficient_data} user datanya belum cukup) dalam {result.seconds:.1f} detik, "
+        f"{result.users_per_second:.1f} user/detik."
+    )
+    return 0
+
+
+def _predictions_compact(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        result = compact_prediction_history(db, keep_days=args.keep_days)
+        db.commit()
+    print(
+        f"History prediksi dipadatkan: {result.duplicate_runs} run duplikat, {result.expired_runs} run kedaluwarsa, "
+        f"{result.legacy_rows} baris lama (tabel predictions) dihapus."
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollup = commands.add_parser("rollup", help="Kelola tabel monthly_rollups.")
+    rollup_commands = rollup.add_subparsers(dest="action", required=True)
+
+    rebuild = rollup_commands.add_parser("rebuild", help="Hitung ulang rollup dari transaksi mentah.")
+    rebuild.add_argument("--user-id", type=int, default=None)
+    rebuild.set_defaults(handler=_rollup_rebuild)
+
+    verify = rollup_commands.add_parser("verify", help="Bandingkan rollup dengan transaksi mentah.")
+    verify.add_argument("--user-id", type=int, default=None)
+    verify.set_defaults(handler=_rollup_verify)
+
+    forecast = commands.add_parser("forecast", help="Kelola tabel precomputed_forecasts.")
+    forecast_commands = forecast.add_subparsers(dest="action", required=True)
+
+    run = forecast_commands.add_parser("run", help="Hitung forecast semua user yang belum terbaru.")
+    run.add_argument("--workers", type=int, default=settings.forecast_batch_workers, help="Default: satu per CPU; 0 = tanpa process pool.")
+    run.add_argument("--chunk-users", type=int, default=settings.forecast_batch_chunk_users)
+    run.add_argument("--force", action="store_true", help="Hitung ulang juga user yang forecast-nya masih terbaru.")
+    run.set_defaults(handler=_forecast_run)
+
+    predictions = commands.add_parser("predictions", help="Kelola history prediksi.")
+    prediction_commands = predictions.add_subparsers(dest="action", required=True)
+
+    compact = prediction_commands.add_parser("compact", help="Hapus run duplikat dan baris history lama.")
+    compact.add_argument(
+        "--keep-days", type=int, default=None, help="Hapus juga run lebih tua dari N hari (run terbaru tetap disimpan)."
+    )
+    compact.set_defaults(handler=_predictions_compact)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Deferred imports of heavy libraries.
+
+`pd = lazy_module("pandas")` binds a proxy that imports pandas on the first
+attribute access, so importing `app.main` does not pay for pandas, numpy,
+pyarrow or openpyxl until a request actually needs them. The import itself
+goes through `importlib.import_module`, which holds the module's import lock,
+so concurrent first uses (or the startup warm-up thread) are safe.
+"""
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: ModuleType | None = None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> Any:
+    """A stand-in for `import name` that defers the import to first use."""
+    return LazyModule(name)
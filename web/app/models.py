@@ -3,7 +3,7 @@ from __future__ import annotations
 import datetime as dt
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, ForeignKey, Numeric, String, Text
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -21,6 +21,7 @@ class User(Base):
 
     transactions: Mapped[list["Transaction"]] = relationship(back_populates="user", cascade="all, delete-orphan")
     predictions: Mapped[list["Prediction"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    prediction_runs: Mapped[list["PredictionRun"]] = relationship(back_populates="user", cascade="all, delete-orphan")
 
 
 class Transaction(Base):
@@ -33,12 +34,18 @@ class Transaction(Base):
     amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
     date: Mapped[dt.date] = mapped_column(Date, nullable=False, index=True)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Set for uploaded rows only; manual entries stay NULL and are never deduplicated.
+    fingerprint: Mapped[str | None] = mapped_column(String(32), nullable=True)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
 
     user: Mapped["User"] = relationship(back_populates="transactions")
 
+    __table_args__ = (Index("uq_transactions_user_fingerprint", "user_id", "fingerprint", unique=True),)
+
 
 class Prediction(Base):
+    """Legacy per-request prediction rows; superseded by `PredictionRun`, kept until compacted."""
+
     __tablename__ = "predictions"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
@@ -49,3 +56,116 @@ class Prediction(Base):
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
 
     user: Mapped["User"] = relationship(back_populates="predictions")
+
+
+class PredictionRun(Base):
+    """A served forecast, recorded once per change of its inputs (data version) or fitted model."""
+
+    __tablename__ = "prediction_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    model_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    horizon_months: Mapped[int] = mapped_column(Integer, nullable=False)
+    data_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    deficit_risk_months: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+    user: Mapped["User"] = relationship(back_populates="prediction_runs")
+    points: Mapped[list["PredictionRunPoint"]] = relationship(
+        back_populates="run", cascade="all, delete-orphan", order_by="PredictionRunPoint.month"
+    )
+
+    __table_args__ = (
+        Index("uq_prediction_runs_input", "user_id", "model_type", "horizon_months", "data_version", unique=True),
+    )
+
+
+class PredictionRunPoint(Base):
+    __tablename__ = "prediction_run_points"
+
+    run_id: Mapped[int] = mapped_column(ForeignKey("prediction_runs.id", ondelete="CASCADE"), primary_key=True)
+    month: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    predicted_value: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+    run: Mapped["PredictionRun"] = relationship(back_populates="points")
+
+
+class PrecomputedForecast(Base):
+    """Forecast written by the batch job; valid while `data_version` matches the user's current version."""
+
+    __tablename__ = "precomputed_forecasts"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    model: Mapped[str] = mapped_column(String(20), primary_key=True)  # requested model: linear / arima
+    horizon_months: Mapped[int] = mapped_column(Integer, primary_key=True)
+    data_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    used_model: Mapped[str | None] = mapped_column(String(30), nullable=True)
+    points: Mapped[list[dict] | None] = mapped_column(JSON, nullable=True)  # [{"month": "YYYY-MM-DD", "predicted_cash_flow": x}]
+    deficit_risk_months: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)  # set instead of points when the data is insufficient
+    computed_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+
+class MonthlyRollup(Base):
+    """Per-user monthly sums and counts, maintained on every transaction write."""
+
+    __tablename__ = "monthly_rollups"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    month: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    category: Mapped[str] = mapped_column(String(120), primary_key=True)
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0, nullable=False)
+    tx_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class UserDataVersion(Base):
+    """Counter bumped on every transaction write; cached results are keyed on it."""
+
+    __tablename__ = "user_data_versions"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+
+
+class IngestionJob(Base):
+    """A background upload; progress is committed together with each ingested chunk."""
+
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    file_path: Mapped[str] = mapped_column(String(1024), nullable=False)
+    file_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    sheet: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued", nullable=False, index=True)  # queued / running / done / failed
+    chunk_rows: Mapped[int] = mapped_column(Integer, nullable=False)
+    chunks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    rows_read: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    inserted_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    skipped_rows: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    duplicate_rows: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # The process running the job, and when it last committed progress; see `ingestion_jobs.claim_job`.
+    claimed_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    heartbeat_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
+    started_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class IngestedFile(Base):
+    """SHA-256 of every fully ingested upload, so re-uploading the same file is a no-op."""
+
+    __tablename__ = "ingested_files"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    file_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    rows_read: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Rows that were invalid, so a re-upload reports only the rows it would have stored as duplicates.
+    skipped_rows: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, nullable=False)
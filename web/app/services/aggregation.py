@@ -0,0 +1,246 @@
+"""Monthly aggregations pushed down to the database as GROUP BY queries.
+
+Only O(months x categories) rows travel over the wire and into pandas, instead
+of every transaction. The month bucket uses `date_trunc` on PostgreSQL and
+`strftime` on SQLite; the dialect is taken from `settings.database_url`.
+
+Queries run either against raw `transactions` or against the pre-bucketed
+`monthly_rollups` table (`source="rollup"`), which share the same shape.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Literal
+
+from sqlalchemy import Float, Select, case, cast, func, literal_column, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.core.lazy import lazy_module
+from app.models import MonthlyRollup, Transaction
+from app.services.analytics import MONTHLY_COLUMNS, AnalyticsBundle, HistoryStats
+
+pd = lazy_module("pandas")
+
+Source = Literal["transactions", "rollup"]
+
+
+def _dialect_name() -> str:
+    return make_url(settings.database_url).get_backend_name()
+
+
+def month_bucket(column: ColumnElement) -> ColumnElement:
+    dialect = _dialect_name()
+    if dialect == "postgresql":
+        # Literal (not a bind parameter) so SELECT and GROUP BY render the identical expression.
+        return func.date_trunc(literal_column("'month'"), column)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-01", column)
+    raise NotImplementedError(f"Agregasi SQL belum didukung untuk database '{dialect}'.")
+
+
+@dataclass
+class _Columns:
+    user_id: ColumnElement
+    type: ColumnElement
+    category: ColumnElement
+    amount: ColumnElement
+    date: ColumnElement
+    month: ColumnElement
+    count: ColumnElement
+
+
+def _columns(source: Source) -> _Columns:
+    if source == "rollup":
+        return _Columns(
+            user_id=MonthlyRollup.user_id,
+            type=MonthlyRollup.type,
+            category=MonthlyRollup.category,
+            amount=MonthlyRollup.total_amount,
+            date=MonthlyRollup.month,
+            month=MonthlyRollup.month,
+            count=func.sum(MonthlyRollup.tx_count),
+        )
+    return _Columns(
+        user_id=Transaction.user_id,
+        type=Transaction.type,
+        category=Transaction.category,
+        amount=Transaction.amount,
+        date=Transaction.date,
+        month=month_bucket(Transaction.date),
+        count=func.count(),
+    )
+
+
+def _sum_where(cols: _Columns, type_: str) -> ColumnElement:
+    return cast(func.sum(case((cols.type == type_, cols.amount), else_=0)), Float)
+
+
+def _scoped(stmt: Select, cols: _Columns, user_id: int, start_date: date | None) -> Select:
+    stmt = stmt.where(cols.user_id == user_id)
+    if start_date is not None:
+        stmt = stmt.where(cols.date >= start_date)
+    return stmt
+
+
+def _as_date(value: object) -> date:
+    return pd.Timestamp(value).date()
+
+
+def monthly_cash_flow_sql(
+    db: Session,
+    user_id: int,
+    start_date: date | None = None,
+    source: Source = "transactions",
+) -> pd.DataFrame:
+    """Same frame as `analytics.monthly_cash_flow`, computed by the database."""
+    cols = _columns(source)
+    month = cols.month.label("month")
+    stmt = _scoped(
+        select(month, _sum_where(cols, "income").label("revenue"), _sum_where(cols, "expense").label("expense")),
+        cols,
+        user_id,
+        start_date,
+    )
+    rows = db.execute(stmt.group_by(month).order_by(month)).all()
+    if not rows:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+
+    out = pd.DataFrame(rows, columns=["month", "revenue", "expense"])
+    out["month"] = pd.to_datetime(out["month"])
+    out[["revenue", "expense"]] = out[["revenue", "expense"]].astype(float)
+    out["net_cash_flow"] = out["revenue"] - out["expense"]
+    return out
+
+
+def monthly_cash_flow_by_user_sql(
+    db: Session,
+    user_ids: list[int],
+    source: Source = "transactions",
+) -> pd.DataFrame:
+    """`monthly_cash_flow` for many users in one (user_id, month) GROUP BY query."""
+    columns = ["user_id", *MONTHLY_COLUMNS]
+    if not user_ids:
+        return pd.DataFrame(columns=columns)
+
+    cols = _columns(source)
+    month = cols.month.label("month")
+    stmt = (
+        select(
+            cols.user_id,
+            month,
+            _sum_where(cols, "income").label("revenue"),
+            _sum_where(cols, "expense").label("expense"),
+        )
+        .where(cols.user_id.in_(user_ids))
+        .group_by(cols.user_id, month)
+        .order_by(cols.user_id, month)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    out = pd.DataFrame(rows, columns=["user_id", "month", "revenue", "expense"])
+    out["month"] = pd.to_datetime(out["month"])
+    out[["revenue", "expense"]] = out[["revenue", "expense"]].astype(float)
+    out["net_cash_flow"] = out["revenue"] - out["expense"]
+    return out
+
+
+def monthly_category_sql(
+    db: Session,
+    user_id: int,
+    type_: str | None = "expense",
+    start_date: date | None = None,
+    source: Source = "transactions",
+) -> pd.DataFrame:
+    """Per (category, month) sums and counts; `type_=None` keeps the type column and groups by it too."""
+    cols = _columns(source)
+    month = cols.month.label("month")
+    keys = [cols.category, month] if type_ else [cols.type, cols.category, month]
+    stmt = _scoped(
+        select(*keys, cast(func.sum(cols.amount), Float).label("amount"), cols.count.label("tx_count")),
+        cols,
+        user_id,
+        start_date,
+    )
+    if type_:
+        stmt = stmt.where(cols.type == type_)
+    rows = db.execute(stmt.group_by(*keys).order_by(*keys)).all()
+
+    columns = ["category", "month", "amount", "tx_count"] if type_ else ["type", "category", "month", "amount", "tx_count"]
+    out = pd.DataFrame(rows, columns=columns)
+    out["month"] = pd.to_datetime(out["month"])
+    out["amount"] = out["amount"].astype(float)
+    # Re-sort in Python: database collations may order categories differently.
+    return out.sort_values(columns[: len(keys)], ignore_index=True)
+
+
+def totals_sql(
+    db: Session,
+    user_id: int,
+    start_date: date | None = None,
+    source: Source = "transactions",
+) -> tuple[float, float]:
+    cols = _columns(source)
+    stmt = _scoped(select(_sum_where(cols, "income"), _sum_where(cols, "expense")), cols, user_id, start_date)
+    revenue, expense = db.execute(stmt).one()
+    return float(revenue or 0.0), float(expense or 0.0)
+
+
+def history_stats_sql(db: Session, user_id: int, source: Source = "transactions") -> tuple[HistoryStats, float, float]:
+    """Lifetime aggregates in one query: month count, negative months and totals.
+
+    Returns `(history, total_revenue, total_expense)`.
+    """
+    cols = _columns(source)
+    per_month = _scoped(
+        select(
+            cols.month.label("month"),
+            _sum_where(cols, "income").label("revenue"),
+            _sum_where(cols, "expense").label("expense"),
+        ),
+        cols,
+        user_id,
+        None,
+    ).group_by(cols.month).subquery()
+
+    month_count, negative_months, revenue, expense = db.execute(
+        select(
+            func.count(),
+            func.sum(case((per_month.c.revenue - per_month.c.expense < 0, 1), else_=0)),
+            func.sum(per_month.c.revenue),
+            func.sum(per_month.c.expense),
+        )
+    ).one()
+    revenue = float(revenue or 0.0)
+    expense = float(expense or 0.0)
+    history = HistoryStats(
+        month_count=int(month_count or 0),
+        negative_months=int(negative_months or 0),
+        total_revenue=revenue,
+        total_net=revenue - expense,
+    )
+    return history, revenue, expense
+
+
+def nth_latest_month(db: Session, user_id: int, n: int, source: Source = "transactions") -> date | None:
+    """First day of the n-th most recent month that has data, or None if there are fewer months."""
+    cols = _columns(source)
+    month = cols.month.label("month")
+    stmt = _scoped(select(month), cols, user_id, None).group_by(month).order_by(month.desc()).offset(n - 1).limit(1)
+    value = db.scalar(stmt)
+    return _as_date(value) if value is not None else None
+
+
+def analytics_bundle_sql(db: Session, user_id: int, source: Source = "transactions") -> AnalyticsBundle:
+    """An `AnalyticsBundle` whose frames all come from GROUP BY queries."""
+    expense_by_category = monthly_category_sql(db, user_id, type_="expense", source=source)
+    return AnalyticsBundle.from_frames(
+        monthly=monthly_cash_flow_sql(db, user_id, source=source),
+        monthly_expense_by_category=expense_by_category[["category", "month", "amount"]],
+        totals=totals_sql(db, user_id, source=source),
+    )
@@ -2,46 +2,101 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
+from functools import cached_property
 from typing import Any
 
-import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import BigInteger, Float, String, cast, func, select, type_coerce
 from sqlalchemy.orm import Session
 
+from app.core.lazy import lazy_module
 from app.models import Transaction
 
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+_LOAD_PARTITION_ROWS = 50_000
+
 
 def _to_month_start(ts: pd.Timestamp) -> date:
     return ts.to_period("M").to_timestamp().date()
 
 
-def load_user_transactions_df(db: Session, user_id: int) -> pd.DataFrame:
-    rows = db.scalars(
-        select(Transaction).where(Transaction.user_id == user_id).order_by(Transaction.date.asc())
-    ).all()
+def _empty_transactions_df(minor_units: bool = False) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": pd.Series(dtype="datetime64[ns]"),
+            "type": pd.Categorical([]),
+            "category": pd.Categorical([]),
+            "amount": pd.Series(dtype="int64" if minor_units else "float64"),
+        }
+    )
 
-    if not rows:
-        return pd.DataFrame(columns=["date", "type", "category", "amount"])
 
-    records = [
+def load_user_transactions_df(
+    db: Session,
+    user_id: int,
+    minor_units: bool = False,
+    start_date: date | None = None,
+) -> pd.DataFrame:
+    """Load a user's transactions as typed columns without hydrating ORM objects.
+
+    Only the four analytic columns are selected. Amounts are cast in SQL so the
+    driver never builds `Decimal` objects; with `minor_units=True` they come back
+    as integer sen/cents (int64) instead of float64. `start_date` is pushed down
+    into the WHERE clause.
+    """
+    if minor_units:
+        amount_col = cast(func.round(Transaction.amount * 100), BigInteger)
+    else:
+        amount_col = cast(Transaction.amount, Float)
+
+    date_col = Transaction.date
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite stores dates as ISO text; parse them in bulk instead of per row.
+        date_col = type_coerce(Transaction.date, String)
+
+    stmt = (
+        select(date_col, Transaction.type, Transaction.category, amount_col)
+        .where(Transaction.user_id == user_id)
+        .order_by(Transaction.date.asc())
+    )
+    if start_date is not None:
+        stmt = stmt.where(Transaction.date >= start_date)
+
+    dates: list[np.ndarray] = []
+    types: list[pd.Categorical] = []
+    categories: list[pd.Categorical] = []
+    amounts: list[np.ndarray] = []
+    for part in db.execute(stmt).partitions(_LOAD_PARTITION_ROWS):
+        date_values, type_values, category_values, amount_values = zip(*part)
+        dates.append(np.asarray(date_values, dtype="datetime64[D]").astype("datetime64[ns]"))
+        types.append(pd.Categorical(type_values))
+        categories.append(pd.Categorical(category_values))
+        amounts.append(np.asarray(amount_values, dtype=np.int64 if minor_units else np.float64))
+
+    if not dates:
+        return _empty_transactions_df(minor_units)
+
+    return pd.DataFrame(
         {
-            "date": pd.Timestamp(row.date),
-            "type": row.type,
-            "category": row.category,
-            "amount": float(row.amount),
+            "date": np.concatenate(dates),
+            "type": pd.api.types.union_categoricals(types, sort_categories=True),
+            "category": pd.api.types.union_categoricals(categories, sort_categories=True),
+            "amount": np.concatenate(amounts),
         }
-        for row in rows
-    ]
-    return pd.DataFrame(records)
+    )
 
 
-def monthly_cash_flow(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return pd.DataFrame(columns=["month", "revenue", "expense", "net_cash_flow"])
+MONTHLY_COLUMNS = ["month", "revenue", "expense", "net_cash_flow"]
+
 
+def _with_month(df: pd.DataFrame) -> pd.DataFrame:
     data = df.copy()
     data["month"] = data["date"].dt.to_period("M").dt.to_timestamp()
+    return data
 
+
+def _monthly_from(data: pd.DataFrame) -> pd.DataFrame:
     revenue = data[data["type"] == "income"].groupby("month", as_index=False)["amount"].sum()
     revenue = revenue.rename(columns={"amount": "revenue"})
 
@@ -53,10 +108,137 @@ def monthly_cash_flow(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+def _expense_by_category_from(data: pd.DataFrame) -> pd.DataFrame:
+    expenses = data[data["type"] == "expense"]
+    return (
+        expenses.groupby(["category", "month"], as_index=False, observed=True)["amount"].sum().sort_values(["category", "month"])
+    )
+
+
+def monthly_cash_flow(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=MONTHLY_COLUMNS)
+    return _monthly_from(_with_month(df))
+
+
+class AnalyticsBundle:
+    """Intermediate frames shared by the summary, health score and expense insights.
+
+    Each frame is computed at most once, on first use, so deriving all three
+    results from one bundle runs the month bucketing and the monthly groupby a
+    single time instead of once per insight.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+
+    @classmethod
+    def from_frames(
+        cls,
+        monthly: pd.DataFrame,
+        monthly_expense_by_category: pd.DataFrame,
+        totals: tuple[float, float],
+    ) -> AnalyticsBundle:
+        """Build a bundle from frames that were already aggregated elsewhere (e.g. in SQL)."""
+        bundle = cls(pd.DataFrame(columns=["date", "type", "category", "amount"]))
+        bundle.__dict__.update(
+            monthly=monthly,
+            monthly_expense_by_category=monthly_expense_by_category,
+            totals=totals,
+        )
+        return bundle
+
+    @cached_property
+    def data(self) -> pd.DataFrame:
+        return _with_month(self.df)
+
+    @cached_property
+    def monthly(self) -> pd.DataFrame:
+        if self.df.empty:
+            return pd.DataFrame(columns=MONTHLY_COLUMNS)
+        return _monthly_from(self.data)
+
+    @cached_property
+    def monthly_expense_by_category(self) -> pd.DataFrame:
+        return _expense_by_category_from(self.data)
+
+    @cached_property
+    def totals(self) -> tuple[float, float]:
+        if self.df.empty:
+            return 0.0, 0.0
+        total_revenue = float(self.df.loc[self.df["type"] == "income", "amount"].sum())
+        total_expense = float(self.df.loc[self.df["type"] == "expense", "amount"].sum())
+        return total_revenue, total_expense
+
+    def summary(self, months: int = 12) -> dict[str, Any]:
+        return _summary_from(self.monthly, *self.totals, months=months)
+
+    def health_score(self) -> dict[str, float | str]:
+        return _health_score_from(self.monthly)
+
+    def expense_intelligence(self) -> dict[str, Any]:
+        if self.monthly.empty:
+            return {"recurring_expenses": [], "recommendations": ["Belum ada data pengeluaran."]}
+        return _expense_intelligence_from(self.monthly_expense_by_category)
+
+    def results(self, months: int = 12) -> dict[str, dict[str, Any]]:
+        return {
+            "summary": self.summary(months=months),
+            "health_score": self.health_score(),
+            "expense_intelligence": self.expense_intelligence(),
+        }
+
+
+def build_analytics(df: pd.DataFrame, months: int = 12) -> dict[str, dict[str, Any]]:
+    """Compute summary, health score and expense intelligence from one bundle."""
+    return AnalyticsBundle(df).results(months=months)
+
+
 def dashboard_summary(df: pd.DataFrame, months: int = 12) -> dict[str, Any]:
-    monthly = monthly_cash_flow(df)
-    total_revenue = float(df.loc[df["type"] == "income", "amount"].sum()) if not df.empty else 0.0
-    total_expense = float(df.loc[df["type"] == "expense", "amount"].sum()) if not df.empty else 0.0
+    return AnalyticsBundle(df).summary(months=months)
+
+
+@dataclass
+class HistoryStats:
+    """Whole-history aggregates the dashboard insights need besides the recent months."""
+
+    month_count: int
+    negative_months: int
+    total_revenue: float
+    total_net: float
+
+    @classmethod
+    def from_monthly(cls, monthly: pd.DataFrame) -> HistoryStats:
+        return cls(
+            month_count=len(monthly),
+            negative_months=int((monthly["net_cash_flow"] < 0).sum()),
+            total_revenue=float(monthly["revenue"].sum()),
+            total_net=float(monthly["net_cash_flow"].sum()),
+        )
+
+
+def windowed_dashboard_summary(
+    monthly_window: pd.DataFrame,
+    history: HistoryStats,
+    total_revenue: float,
+    total_expense: float,
+    months: int = 12,
+) -> dict[str, Any]:
+    """Dashboard summary from only the latest `max(months, 3)` months plus lifetime aggregates.
+
+    Gives the same result as `dashboard_summary` on the full history without
+    loading months older than the trend window.
+    """
+    return _summary_from(monthly_window, total_revenue, total_expense, months=months, history=history)
+
+
+def _summary_from(
+    monthly: pd.DataFrame,
+    total_revenue: float,
+    total_expense: float,
+    months: int,
+    history: HistoryStats | None = None,
+) -> dict[str, Any]:
     net_profit = total_revenue - total_expense
     margin_percent = (net_profit / total_revenue * 100.0) if total_revenue > 0 else 0.0
 
@@ -73,7 +255,7 @@ def dashboard_summary(df: pd.DataFrame, months: int = 12) -> dict[str, Any]:
             for row in monthly_tail.itertuples(index=False)
         ]
 
-    insights = detect_basic_insights(monthly)
+    insights = detect_basic_insights(monthly, history=history)
     return {
         "total_revenue": round(total_revenue, 2),
         "total_expense": round(total_expense, 2),
@@ -84,13 +266,18 @@ def dashboard_summary(df: pd.DataFrame, months: int = 12) -> dict[str, Any]:
     }
 
 
-def detect_basic_insights(monthly: pd.DataFrame) -> list[str]:
+def detect_basic_insights(monthly: pd.DataFrame, history: HistoryStats | None = None) -> list[str]:
+    """Rule-based insights; `monthly` must hold at least the latest 3 months.
+
+    Whole-history figures come from `history`, which defaults to `monthly` itself.
+    """
     if monthly.empty:
         return ["Belum ada data transaksi untuk dianalisis."]
 
+    history = history or HistoryStats.from_monthly(monthly)
     insights: list[str] = []
 
-    if len(monthly) >= 3:
+    if history.month_count >= 3:
         recent = monthly.tail(3).copy()
         start_expense = float(recent.iloc[0]["expense"])
         end_expense = float(recent.iloc[-1]["expense"])
@@ -101,11 +288,11 @@ def detect_basic_insights(monthly: pd.DataFrame) -> list[str]:
                     f"Biaya operasional meningkat sekitar {increase:.1f}% dalam 2 bulan terakhir."
                 )
 
-    negative_months = int((monthly["net_cash_flow"] < 0).sum())
+    negative_months = history.negative_months
     if negative_months > 0:
         insights.append(f"Terdapat {negative_months} bulan dengan cash flow negatif.")
 
-    avg_margin = (monthly["net_cash_flow"].sum() / monthly["revenue"].sum() * 100.0) if monthly["revenue"].sum() > 0 else 0.0
+    avg_margin = (history.total_net / history.total_revenue * 100.0) if history.total_revenue > 0 else 0.0
     if avg_margin >= 20:
         insights.append("Margin bisnis tergolong sehat (>= 20%).")
     elif avg_margin < 10:
@@ -118,7 +305,10 @@ def detect_basic_insights(monthly: pd.DataFrame) -> list[str]:
 
 
 def financial_health_score(df: pd.DataFrame) -> dict[str, float | str]:
-    monthly = monthly_cash_flow(df)
+    return AnalyticsBundle(df).health_score()
+
+
+def _health_score_from(monthly: pd.DataFrame) -> dict[str, float | str]:
     if monthly.empty:
         return {
             "health_score": 0.0,
@@ -175,49 +365,74 @@ class RecurringExpense:
 
 
 def expense_intelligence(df: pd.DataFrame) -> dict[str, Any]:
-    if df.empty:
-        return {"recurring_expenses": [], "recommendations": ["Belum ada data pengeluaran."]}
-
-    expenses = df[df["type"] == "expense"].copy()
-    if expenses.empty:
+    return AnalyticsBundle(df).expense_intelligence()
+
+
+def _segment_mean_std(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and population std of contiguous segments `values[start:start + length]`.
+
+    Segments of equal length are stacked into one 2-D block and reduced along
+    rows. This keeps numpy's per-row summation order, so results are bit-for-bit
+    the same as `Series.mean()` / `Series.std(ddof=0)` on each segment, while the
+    Python loop runs once per distinct length (bounded by the number of months)
+    rather than once per category.
+    """
+    mean = np.full(len(starts), np.nan)
+    std = np.full(len(starts), np.nan)
+    for length in np.unique(lengths[lengths > 0]):
+        idx = np.flatnonzero(lengths == length)
+        block = values[starts[idx, None] + np.arange(length)]
+        block_mean = block.sum(axis=1) / length
+        mean[idx] = block_mean
+        std[idx] = np.sqrt(((block_mean[:, None] - block) ** 2).sum(axis=1) / length)
+    return mean, std
+
+
+def _expense_intelligence_from(monthly_cat: pd.DataFrame) -> dict[str, Any]:
+    """Recurring-expense and cost-jump rules as grouped array operations.
+
+    `monthly_cat` has one row per (category, month), sorted by category then
+    month, so each category is a contiguous run whose length is its number of
+    active months and whose last row is the latest month.
+    """
+    if monthly_cat.empty:
         return {"recurring_expenses": [], "recommendations": ["Belum ada data expense."]}
 
-    expenses["month"] = expenses["date"].dt.to_period("M").dt.to_timestamp()
-    monthly_cat = (
-        expenses.groupby(["category", "month"], as_index=False)["amount"].sum().sort_values(["category", "month"])
-    )
+    codes, categories = pd.factorize(monthly_cat["category"], sort=False)
+    values = monthly_cat["amount"].to_numpy(dtype=np.float64)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    active_months = np.diff(np.r_[starts, len(values)])
+    categories = np.asarray(categories, dtype=object)[codes[starts]]
+
+    avg_amount, std_amount = _segment_mean_std(values, starts, active_months)
+    std_amount = np.where(active_months > 1, std_amount, 0.0)
+    cv = std_amount / np.maximum(avg_amount, 1.0)
+
+    latest = values[starts + active_months - 1]
+    previous_avg, _ = _segment_mean_std(values, starts, active_months - 1)
+    previous_avg = np.where(active_months > 1, previous_avg, latest)
+
+    established = active_months >= 3
+
+    recurring_idx = np.flatnonzero(established & (cv <= 0.5))
+    recurring_avg = np.round(avg_amount[recurring_idx], 2)
+    top_idx = recurring_idx[np.argsort(-recurring_avg, kind="stable")[:5]]
+    top_recurring = [
+        RecurringExpense(
+            category=str(categories[i]),
+            average_monthly_amount=round(float(avg_amount[i]), 2),
+            active_months=int(active_months[i]),
+        )
+        for i in top_idx
+    ]
 
-    recurring_items: list[RecurringExpense] = []
-    recommendations: list[str] = []
-
-    for category, group in monthly_cat.groupby("category"):
-        months_active = int(group["month"].nunique())
-        avg_amount = float(group["amount"].mean())
-        std_amount = float(group["amount"].std(ddof=0)) if len(group) > 1 else 0.0
-        cv = std_amount / max(avg_amount, 1.0)
-
-        if months_active >= 3 and cv <= 0.5:
-            recurring_items.append(
-                RecurringExpense(
-                    category=category,
-                    average_monthly_amount=round(avg_amount, 2),
-                    active_months=months_active,
-                )
-            )
-
-        if months_active >= 3:
-            recent = group.sort_values("month")
-            latest = float(recent.iloc[-1]["amount"])
-            previous_avg = float(recent.iloc[:-1]["amount"].mean()) if len(recent) > 1 else latest
-            if previous_avg > 0:
-                jump_pct = ((latest - previous_avg) / previous_avg) * 100.0
-                if jump_pct >= 25:
-                    recommendations.append(
-                        f"Biaya kategori '{category}' naik {jump_pct:.1f}% dibanding rata-rata sebelumnya. Evaluasi kebutuhan kategori ini."
-                    )
-
-    recurring_items.sort(key=lambda x: x.average_monthly_amount, reverse=True)
-    top_recurring = recurring_items[:5]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jump_pct = ((latest - previous_avg) / previous_avg) * 100.0
+    jump_idx = np.flatnonzero(established & (previous_avg > 0) & (jump_pct >= 25))[:5]
+    recommendations = [
+        f"Biaya kategori '{categories[i]}' naik {jump_pct[i]:.1f}% dibanding rata-rata sebelumnya. Evaluasi kebutuhan kategori ini."
+        for i in jump_idx
+    ]
 
     if top_recurring:
         recommendations.append(
@@ -0,0 +1,80 @@
+"""Rolling-origin backtesting and model selection for `model=auto`.
+
+Every candidate in `prediction.FORECASTERS` is refitted at each of the last
+`BACKTEST_MAX_FOLDS` origins of the monthly series: trained on the months
+before the origin and scored against the (up to `horizon`) months after it.
+All candidates share the same origins, so their mean absolute errors are
+comparable; a candidate that cannot be fitted on the earliest origin's
+history is left out. ARIMA folds run concurrently in the forecast pool.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.lazy import lazy_module
+from app.services.forecast_pool import run_fits
+from app.services.prediction import ARIMA_AVAILABLE, FORECASTERS
+
+np = lazy_module("numpy")
+
+# Shortest history a fold is trained on.
+MIN_TRAIN_MONTHS = 3
+DEFAULT_MODEL = "linear_regression"
+
+
+@dataclass
+class BacktestResult:
+    model: str
+    folds: int
+    mae: dict[str, float] = field(default_factory=dict)
+    # The backtest's pick when the forecast had to fall back to `model` instead.
+    fallback_from: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "selected_model": self.model,
+            "folds": self.folds,
+            "mae": dict(self.mae),
+            "fallback_from": self.fallback_from,
+        }
+
+
+def rolling_origins(months: int, max_folds: int) -> list[int]:
+    """Origins (length of the training prefix) of the last `max_folds` folds."""
+    return list(range(max(MIN_TRAIN_MONTHS, months - max_folds), months))
+
+
+def backtest(y: np.ndarray, horizon_months: int, max_folds: int | None = None) -> BacktestResult:
+    """Score every candidate by rolling-origin MAE and pick the lowest (ties go to the earlier candidate)."""
+    y = np.asarray(y, dtype=np.float64)
+    origins = rolling_origins(len(y), settings.backtest_max_folds if max_folds is None else max_folds)
+    if not origins:
+        return BacktestResult(model=DEFAULT_MODEL, folds=0)
+
+    folds = [(y[:origin], y[origin : origin + horizon_months]) for origin in origins]
+    candidates = [
+        name
+        for name, (_, min_months) in FORECASTERS.items()
+        if min_months <= origins[0] and (name != "arima" or ARIMA_AVAILABLE)
+    ]
+
+    forecasts: dict[str, list] = {}
+    if "arima" in candidates:
+        arima_forecast, _ = FORECASTERS["arima"]
+        fitted = run_fits(arima_forecast, [(train, len(actual)) for train, actual in folds])
+        if not any(isinstance(result, Exception) for result in fitted):
+            forecasts["arima"] = fitted
+    for name in candidates:
+        if name != "arima":
+            forecaster, _ = FORECASTERS[name]
+            forecasts[name] = [forecaster(train, len(actual)) for train, actual in folds]
+
+    actual = np.concatenate([actual for _, actual in folds])
+    mae = {
+        name: float(np.mean(np.abs(np.concatenate(forecasts[name]) - actual)))
+        for name in candidates
+        if name in forecasts
+    }
+    best = min(mae, key=lambda name: (mae[name], candidates.index(name)))
+    return BacktestResult(model=best, folds=len(folds), mae={name: round(value, 2) for name, value in mae.items()})
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.data_version import get_data_version
+
+T = TypeVar("T")
+
+CACHES: dict[str, "ResultCache"] = {}
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class ResultCache:
+    """Thread-safe in-process LRU cache with a TTL and a byte budget.
+
+    Cached values are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int, ttl_seconds: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry.value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(value=value, size=size, expires_at=time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], T]) -> T:
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+
+analytics_cache = ResultCache(
+    "analytics",
+    max_entries=settings.analytics_cache_max_entries,
+    max_bytes=settings.analytics_cache_max_bytes,
+    ttl_seconds=settings.analytics_cache_ttl_seconds,
+)
+
+forecast_cache = ResultCache(
+    "forecast",
+    max_entries=settings.forecast_cache_max_entries,
+    max_bytes=settings.forecast_cache_max_bytes,
+    ttl_seconds=settings.forecast_cache_ttl_seconds,
+)
+
+
+def cached_user_result(
+    db: Session,
+    user_id: int,
+    endpoint: str,
+    params: tuple[Hashable, ...],
+    compute: Callable[[], T],
+    cache: ResultCache = analytics_cache,
+) -> T:
+    """Serve `compute()` from `cache` until the user's data version changes."""
+    key = (user_id, endpoint, params, get_data_version(db, user_id))
+    return cache.get_or_compute(key, compute)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models import UserDataVersion
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    version = db.scalar(select(UserDataVersion.version).where(UserDataVersion.user_id == user_id))
+    return int(version or 0)
+
+
+def bump_data_version(db: Session, user_id: int) -> None:
+    """Increment the user's data version inside the caller's transaction."""
+    now = dt.datetime.utcnow()
+    stmt = dialect_insert(db)(UserDataVersion).values(user_id=user_id, version=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"version": UserDataVersion.version + 1, "updated_at": now},
+    )
+    db.execute(stmt)
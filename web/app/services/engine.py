@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import lazy_module
+from app.models import PrecomputedForecast
+from app.services.aggregation import (
+    Source,
+    analytics_bundle_sql,
+    history_stats_sql,
+    monthly_cash_flow_by_user_sql,
+    monthly_cash_flow_sql,
+    nth_latest_month,
+)
+from app.services.analytics import MONTHLY_COLUMNS, AnalyticsBundle, monthly_cash_flow, windowed_dashboard_summary
+from app.services.backtest import BacktestResult, backtest
+from app.services.cache import cached_user_result, forecast_cache
+from app.services.data_version import get_data_version
+from app.services.prediction import add_intervals, arima_residuals, cash_flow_series, predict_from_monthly
+from app.services.prediction_history import record_prediction_run
+from app.services.rollup import load_user_rollup_df
+from app.services.scenario import Scenario, ScenarioInputs, simulate_scenario
+
+pd = lazy_module("pandas")
+
+# Months of context `detect_basic_insights` reads besides the trend window.
+INSIGHT_CONTEXT_MONTHS = 3
+# What a cached point forecast keeps of a banded point.
+_POINT_KEYS = ("month", "predicted_cash_flow")
+
+
+def _aggregate_source() -> Source:
+    return "transactions" if settings.analytics_backend == "sql" else "rollup"
+
+
+def user_analytics_bundle(db: Session, user_id: int) -> AnalyticsBundle:
+    """Bundle for one user from the configured backend (`settings.analytics_backend`)."""
+    if settings.analytics_backend == "sql":
+        return analytics_bundle_sql(db, user_id)
+    return AnalyticsBundle(load_user_rollup_df(db, user_id))
+
+
+def user_monthly_cash_flow(db: Session, user_id: int) -> pd.DataFrame:
+    if settings.analytics_backend == "sql":
+        return monthly_cash_flow_sql(db, user_id)
+    return monthly_cash_flow(load_user_rollup_df(db, user_id))
+
+
+def monthly_cash_flow_by_user(db: Session, user_ids: list[int]) -> pd.DataFrame:
+    return monthly_cash_flow_by_user_sql(db, user_ids, source=_aggregate_source())
+
+
+def stored_forecast(
+    db: Session,
+    user_id: int,
+    horizon_months: int,
+    model: str,
+    data_version: int,
+) -> tuple[str, list[dict[str, float | date]], int] | None:
+    """The batch-precomputed forecast if it was computed from `data_version`, else None."""
+    stored = db.scalar(
+        select(PrecomputedForecast).where(
+            PrecomputedForecast.user_id == user_id,
+            PrecomputedForecast.model == model,
+            PrecomputedForecast.horizon_months == horizon_months,
+            PrecomputedForecast.data_version == data_version,
+        )
+    )
+    if stored is None:
+        return None
+    if stored.error:
+        raise ValueError(stored.error)
+    points = [
+        {"month": date.fromisoformat(point["month"]), "predicted_cash_flow": point["predicted_cash_flow"]}
+        for point in stored.points
+    ]
+    return stored.used_model, points, stored.deficit_risk_months
+
+
+def user_cash_flow_forecast(
+    db: Session,
+    user_id: int,
+    horizon_months: int = 6,
+    model: str = "linear",
+    intervals: bool = False,
+) -> tuple[str, list[dict[str, float | date]], int]:
+    """`predict_from_monthly` for one user, fitted once per data version.
+
+    The ARIMA fit dominates a forecast request and only changes when the
+    user's transactions do, so results live in `forecast_cache` keyed on
+    (model, horizon) and the user's data version. On a miss the nightly
+    batch's stored forecast is used when it is still current; only stale or
+    missing forecasts are fitted live. Each miss records the forecast in the
+    prediction history, which writes only if it changed; the caller commits.
+    With `intervals`, the bootstrap bands of the model used are added to the
+    (cached) point forecast and cached alongside it; the points are returned
+    without bands when that model's residuals cannot be bootstrapped. A live
+    ARIMA fit yields the bands in the same fit; ARIMA is refitted for its
+    residuals only when the point forecast came from the cache or the batch.
+    """
+    banded = None
+
+    def compute() -> tuple[str, list[dict[str, float | date]], int]:
+        nonlocal banded
+        data_version = get_data_version(db, user_id)
+        result = stored_forecast(db, user_id, horizon_months, model, data_version)
+        if result is None:
+            monthly = user_monthly_cash_flow(db, user_id)
+            result = predict_from_monthly(monthly, horizon_months=horizon_months, model=model, intervals=intervals)
+            if intervals:
+                banded = result
+                used_model, points, deficit_risk = result
+                result = used_model, [{key: point[key] for key in _POINT_KEYS} for point in points], deficit_risk
+        record_prediction_run(db, user_id, data_version, *result)
+        return result
+
+    result = cached_user_result(db, user_id, "forecast", (model, horizon_months), compute, cache=forecast_cache)
+    if not intervals:
+        return result
+
+    def compute_intervals() -> tuple[str, list[dict[str, float | date]], int]:
+        if banded is not None:
+            return banded
+        used_model, points, deficit_risk = result
+        y = cash_flow_series(user_monthly_cash_flow(db, user_id))
+        arima = arima_residuals(y, horizon_months) if used_model == "arima" else None
+        return used_model, add_intervals(y, points, used_model, arima=arima) or points, deficit_risk
+
+    return cached_user_result(
+        db, user_id, "forecast_intervals", (model, horizon_months), compute_intervals, cache=forecast_cache
+    )
+
+
+def user_backtest(db: Session, user_id: int, horizon_months: int = 6) -> BacktestResult:
+    """Rolling-origin backtest of every candidate model, once per data version."""
+    return cached_user_result(
+        db,
+        user_id,
+        "backtest",
+        (horizon_months,),
+        lambda: backtest(cash_flow_series(user_monthly_cash_flow(db, user_id)), horizon_months),
+        cache=forecast_cache,
+    )
+
+
+def user_auto_forecast(
+    db: Session,
+    user_id: int,
+    horizon_months: int = 6,
+    intervals: bool = False,
+) -> tuple[str, list[dict[str, float | date]], int, BacktestResult]:
+    """Forecast with the model that backtests best on the user's own history, plus its error metrics.
+
+    When the live fit of the selected model fails (e.g. an ARIMA timeout) and
+    the forecast falls back, the metrics name the model actually used and keep
+    the backtest's pick in `fallback_from`.
+    """
+    if horizon_months < 3 or horizon_months > 12:
+        raise ValueError("horizon_months harus antara 3 dan 12.")
+
+    selection = user_backtest(db, user_id, horizon_months)
+    used_model, points, deficit_risk = user_cash_flow_forecast(
+        db, user_id, horizon_months, model=selection.model, intervals=intervals
+    )
+    if used_model != selection.model:
+        selection = replace(selection, model=used_model, fallback_from=selection.model)
+    return used_model, points, deficit_risk, selection
+
+
+def user_scenario(db: Session, user_id: int, scenario: Scenario) -> dict[str, Any]:
+    """`simulate_scenario` for one user, cached per scenario hash and data version.
+
+    The history the simulation starts from is cached separately, so a new
+    scenario (e.g. a dashboard slider moving) only pays for the simulation.
+    """
+    inputs = cached_user_result(
+        db,
+        user_id,
+        "scenario_inputs",
+        (),
+        lambda: ScenarioInputs.from_bundle(user_analytics_bundle(db, user_id)),
+        cache=forecast_cache,
+    )
+    return cached_user_result(
+        db,
+        user_id,
+        "scenario",
+        (scenario.scenario_hash(),),
+        lambda: simulate_scenario(inputs, scenario),
+        cache=forecast_cache,
+    )
+
+
+def user_analytics(db: Session, user_id: int, months: int = 12) -> dict[str, dict[str, Any]]:
+    """Summary, health score and expense intelligence for one user, computed together.
+
+    Dashboard, insights and chat share this entry point, so one bundle (and one
+    cache entry per `months`) serves all three until the user's data changes.
+    """
+    return cached_user_result(
+        db,
+        user_id,
+        "analytics",
+        (months,),
+        lambda: user_analytics_bundle(db, user_id).results(months=months),
+    )
+
+
+def user_dashboard_summary(db: Session, user_id: int, months: int = 12) -> dict[str, Any]:
+    """Dashboard summary that only fetches the months it shows.
+
+    Lifetime totals and negative-month counts come from one aggregate query;
+    monthly rows are fetched from the start of the latest `max(months, 3)`
+    months onward, pushed down as a `start_date` filter.
+    """
+
+    def compute() -> dict[str, Any]:
+        source = _aggregate_source()
+        history, total_revenue, total_expense = history_stats_sql(db, user_id, source=source)
+        start_date = nth_latest_month(db, user_id, max(months, INSIGHT_CONTEXT_MONTHS), source=source)
+        monthly_window = monthly_cash_flow_sql(db, user_id, start_date=start_date, source=source)
+        return windowed_dashboard_summary(monthly_window, history, total_revenue, total_expense, months=months)
+
+    return cached_user_result(db, user_id, "dashboard.summary", (months,), compute)
+
+
+def batch_dashboard_summaries(db: Session, user_ids: list[int], months: int = 12) -> dict[int, dict[str, Any]]:
+    """Dashboard summaries for many users from a single grouped (user_id, month) query."""
+    monthly_by_user = monthly_cash_flow_by_user(db, user_ids)
+    empty_monthly = pd.DataFrame(columns=MONTHLY_COLUMNS)
+    empty_categories = pd.DataFrame(columns=["category", "month", "amount"])
+
+    groups = {
+        int(user_id): frame[MONTHLY_COLUMNS].reset_index(drop=True)
+        for user_id, frame in monthly_by_user.groupby("user_id", sort=False)
+    }
+    summaries: dict[int, dict[str, Any]] = {}
+    for user_id in user_ids:
+        monthly = groups.get(user_id, empty_monthly)
+        totals = (float(monthly["revenue"].sum()), float(monthly["expense"].sum())) if not monthly.empty else (0.0, 0.0)
+        bundle = AnalyticsBundle.from_frames(monthly, empty_categories, totals)
+        summaries[user_id] = bundle.summary(months=months)
+    return summaries
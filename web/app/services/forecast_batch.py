@@ -0,0 +1,172 @@
+"""Nightly batch forecasting into `precomputed_forecasts`.
+
+Every user with a missing or stale forecast gets linear and ARIMA forecasts
+for all horizons (3-12 months) and they are stored with the data version they
+were computed from. Linear trends of a whole chunk are fitted at once as one
+padded matrix; ARIMA fits run in a process pool. Users are processed in
+chunks that are committed one at a time; a rerun only picks up users whose
+stored forecasts are not current, so an interrupted run resumes where it
+stopped.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import multiprocessing
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.lazy import lazy_module
+from app.database import dialect_insert
+from app.models import PrecomputedForecast, User, UserDataVersion
+from app.services.analytics import MONTHLY_COLUMNS
+from app.services.engine import monthly_cash_flow_by_user
+from app.services.prediction import FORECAST_HORIZONS, FORECAST_MODELS, predict_all_horizons, predict_linear_batch
+
+pd = lazy_module("pandas")
+
+FORECASTS_PER_USER = len(FORECAST_MODELS) * len(FORECAST_HORIZONS)
+STORED_COLUMNS = ("data_version", "used_model", "points", "deficit_risk_months", "error", "computed_at")
+
+
+@dataclass
+class BatchForecastResult:
+    users: int = 0
+    insufficient_data: int = 0
+    forecasts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.users / self.seconds if self.seconds else 0.0
+
+
+def _forecast_user(monthly: pd.DataFrame) -> dict | str:
+    """ARIMA forecasts of one user; linear ones are fitted for the whole chunk in the parent."""
+    try:
+        return predict_all_horizons(monthly, models=("arima",))
+    except ValueError as exc:
+        return str(exc)
+
+
+def stale_user_ids(db: Session, force: bool = False) -> list[int]:
+    """Users whose stored forecasts are missing or older than their data version."""
+    stmt = select(User.id).order_by(User.id.asc())
+    if not force:
+        current = (
+            select(func.count())
+            .select_from(PrecomputedForecast)
+            .where(
+                PrecomputedForecast.user_id == User.id,
+                PrecomputedForecast.data_version == func.coalesce(UserDataVersion.version, 0),
+            )
+            .scalar_subquery()
+        )
+        stmt = stmt.outerjoin(UserDataVersion, UserDataVersion.user_id == User.id).where(current < FORECASTS_PER_USER)
+    return list(db.scalars(stmt).all())
+
+
+def _store(db: Session, user_id: int, version: int, result: dict | str) -> int:
+    now = dt.datetime.utcnow()
+    rows = []
+    for model in FORECAST_MODELS:
+        for horizon in FORECAST_HORIZONS:
+            row = {
+                "user_id": user_id,
+                "model": model,
+                "horizon_months": horizon,
+                "data_version": version,
+                "used_model": None,
+                "points": None,
+                "deficit_risk_months": None,
+                "error": None,
+                "computed_at": now,
+            }
+            if isinstance(result, str):
+                row["error"] = result
+            else:
+                used_model, points, deficit_risk = result[(model, horizon)]
+                row["used_model"] = used_model
+                row["points"] = [
+                    {"month": point["month"].isoformat(), "predicted_cash_flow": point["predicted_cash_flow"]}
+                    for point in points
+                ]
+                row["deficit_risk_months"] = deficit_risk
+            rows.append(row)
+
+    stmt = dialect_insert(db)(PrecomputedForecast)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "model", "horizon_months"],
+        set_={name: stmt.excluded[name] for name in STORED_COLUMNS},
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+def _chunks(items: list[int], size: int) -> Iterator[list[int]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def run_batch_forecast(
+    db: Session,
+    workers: int,
+    chunk_users: int,
+    force: bool = False,
+    on_chunk: Callable[[BatchForecastResult, int], None] | None = None,
+) -> BatchForecastResult:
+    """Forecast every stale user; `workers=0` fits in this process.
+
+    `on_chunk(result, remaining_users)` is called after each committed chunk.
+    """
+    started = time.perf_counter()
+    result = BatchForecastResult()
+    user_ids = stale_user_ids(db, force=force)
+    db.rollback()
+
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) if workers > 0 else None
+    )
+    try:
+        remaining = len(user_ids)
+        for chunk in _chunks(user_ids, chunk_users):
+            # Versions are read before the data, so a write racing the batch leaves the forecast stale, not wrong.
+            versions = dict(
+                db.execute(
+                    select(UserDataVersion.user_id, UserDataVersion.version).where(UserDataVersion.user_id.in_(chunk))
+                ).all()
+            )
+            monthly_by_user = monthly_cash_flow_by_user(db, chunk)
+            groups = {
+                int(user_id): frame[MONTHLY_COLUMNS].reset_index(drop=True)
+                for user_id, frame in monthly_by_user.groupby("user_id", sort=False)
+            }
+            empty = pd.DataFrame(columns=MONTHLY_COLUMNS)
+            frames = [groups.get(user_id, empty) for user_id in chunk]
+
+            if executor is not None:
+                forecasts = executor.map(_forecast_user, frames, chunksize=max(1, len(frames) // (workers * 4)))
+            else:
+                forecasts = map(_forecast_user, frames)
+            for user_id, linear, forecast in zip(chunk, predict_linear_batch(frames), forecasts, strict=True):
+                if not isinstance(forecast, str):
+                    forecast = {**linear, **forecast}
+                result.forecasts += _store(db, user_id, int(versions.get(user_id, 0)), forecast)
+                result.insufficient_data += isinstance(forecast, str)
+            db.commit()
+
+            result.users += len(chunk)
+            remaining -= len(chunk)
+            result.seconds = time.perf_counter() - started
+            if on_chunk is not None:
+                on_chunk(result, remaining)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,274 @@
+"""Size-limited process pool for CPU-heavy model fits.
+
+Fits run in `FORECAST_POOL_WORKERS` spawned processes so statsmodels never
+occupies the request threadpool. Each fit has a wall-clock timeout; a fit that
+times out is abandoned and its pool is retired: new fits go to a fresh pool,
+the fits already running on the old one finish normally, and once only
+timed-out fits are left its processes are killed. When
+`FORECAST_POOL_MAX_QUEUE` fits are already in flight, new ones are rejected
+immediately. Callers treat `PoolUnavailable` (and any other exception) as a
+failed fit and fall back to a cheaper model.
+"""
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import statistics
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import partial
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+DURATION_SAMPLES = 512
+
+
+class PoolUnavailable(RuntimeError):
+    """The fit was not run to completion (queue full or timed out)."""
+
+
+def _timed_call(fn: Callable[..., T], args: tuple) -> tuple[T, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _preload(module: str) -> None:
+    importlib.import_module(module)
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.fit_seconds: deque[float] = deque(maxlen=DURATION_SAMPLES)
+        self.wait_seconds: deque[float] = deque(maxlen=DURATION_SAMPLES)
+
+
+_stats = _Stats()
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Unfinished fits per pool, and the timed-out ones of pools being retired.
+_running: dict[ProcessPoolExecutor, set[Future]] = {}
+_retiring: dict[ProcessPoolExecutor, set[Future]] = {}
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.forecast_pool_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def _discard(executor: ProcessPoolExecutor) -> None:
+    """Replace a broken pool and kill its processes right away."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+        _running.pop(executor, None)
+        _retiring.pop(executor, None)
+    _terminate(executor)
+
+
+def _reap(executor: ProcessPoolExecutor) -> None:
+    """Kill a retiring pool once nothing but its timed-out fits is still running."""
+    with _executor_lock:
+        stuck = _retiring.get(executor)
+        if stuck is None or not _running.get(executor, set()) <= stuck:
+            return
+        del _retiring[executor]
+        _running.pop(executor, None)
+    _terminate(executor)
+
+
+def _retire(executor: ProcessPoolExecutor, timed_out: Future) -> None:
+    """Send new fits to a fresh pool; the old one is killed when its other fits are done."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+        _retiring.setdefault(executor, set()).add(timed_out)
+    _reap(executor)
+
+
+def _on_done(executor: ProcessPoolExecutor, future: Future) -> None:
+    with _stats.lock:
+        _stats.in_flight -= 1
+    with _executor_lock:
+        _running.get(executor, set()).discard(future)
+    _reap(executor)
+
+
+def _submit(executor: ProcessPoolExecutor, fn: Callable[..., T], args: tuple) -> Future:
+    with _stats.lock:
+        if _stats.in_flight >= settings.forecast_pool_max_queue:
+            _stats.rejected += 1
+            raise PoolUnavailable("Antrean fitting model penuh.")
+        _stats.in_flight += 1
+        _stats.submitted += 1
+
+    try:
+        future = executor.submit(_timed_call, fn, args)
+    except Exception:
+        with _stats.lock:
+            _stats.in_flight -= 1
+            _stats.failed += 1
+        _discard(executor)
+        raise
+    with _executor_lock:
+        _running.setdefault(executor, set()).add(future)
+    future.add_done_callback(partial(_on_done, executor))
+    return future
+
+
+def _collect(executor: ProcessPoolExecutor, future: Future, started: float, timeout: float) -> Any:
+    try:
+        result, fit_seconds = future.result(timeout=max(0.0, started + timeout - time.perf_counter()))
+    except FutureTimeout as exc:
+        with _stats.lock:
+            _stats.timed_out += 1
+        _retire(executor, future)
+        raise PoolUnavailable(f"Fitting model melebihi batas {timeout:g} detik.") from exc
+    except Exception:
+        with _stats.lock:
+            _stats.failed += 1
+        raise
+
+    with _stats.lock:
+        _stats.completed += 1
+        _stats.fit_seconds.append(fit_seconds)
+        _stats.wait_seconds.append(time.perf_counter() - started - fit_seconds)
+    return result
+
+
+def run_fit(fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+    """Run a picklable module-level `fn(*args)` in the pool and wait up to `timeout` seconds.
+
+    With `FORECAST_POOL_WORKERS=0` the fit runs inline, without a timeout.
+    """
+    if settings.forecast_pool_workers <= 0:
+        return fn(*args)
+
+    timeout = settings.forecast_fit_timeout_seconds if timeout is None else timeout
+    executor = _pool()
+    started = time.perf_counter()
+    return _collect(executor, _submit(executor, fn, args), started, timeout)
+
+
+def run_fits(fn: Callable[..., T], calls: list[tuple], timeout: float | None = None) -> list[T | Exception]:
+    """Run `fn(*args)` for every tuple in `calls` concurrently; a failed fit comes back as its exception.
+
+    The batch may take `timeout` seconds per round of `FORECAST_POOL_WORKERS`
+    fits. Fits that are rejected because the queue is full are not retried.
+    """
+    results: list[T | Exception] = []
+    if settings.forecast_pool_workers <= 0:
+        for args in calls:
+            try:
+                results.append(fn(*args))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    timeout = settings.forecast_fit_timeout_seconds if timeout is None else timeout
+    rounds = -(-len(calls) // settings.forecast_pool_workers)
+    executor = _pool()
+    started = time.perf_counter()
+    futures: list[Future | Exception] = []
+    for args in calls:
+        try:
+            futures.append(_submit(executor, fn, args))
+        except Exception as exc:
+            futures.append(exc)
+    for future in futures:
+        if isinstance(future, Exception):
+            results.append(future)
+            continue
+        try:
+            results.append(_collect(executor, future, started, timeout * rounds))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+def warm_up(modules: tuple[str, ...]) -> None:
+    """Start every worker process and import `modules` in it, so the first fit does not pay for either."""
+    if settings.forecast_pool_workers <= 0:
+        for module in modules:
+            _preload(module)
+        return
+    executor = _pool()
+    futures = [
+        executor.submit(_preload, module) for _ in range(settings.forecast_pool_workers) for module in modules
+    ]
+    for future in futures:
+        future.result()
+
+
+def _summary(samples: deque[float]) -> dict[str, float | int]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def stats() -> dict[str, Any]:
+    """Queue depth, outcome counters and recent fit/wait durations (seconds)."""
+    with _stats.lock:
+        return {
+            "workers": settings.forecast_pool_workers,
+            "max_queue": settings.forecast_pool_max_queue,
+            "timeout_seconds": settings.forecast_fit_timeout_seconds,
+            "in_flight": _stats.in_flight,
+            "submitted": _stats.submitted,
+            "completed": _stats.completed,
+            "failed": _stats.failed,
+            "timed_out": _stats.timed_out,
+            "rejected": _stats.rejected,
+            "retiring_pools": len(_retiring),
+            "fit_seconds": _summary(_stats.fit_seconds),
+            "wait_seconds": _summary(_stats.wait_seconds),
+        }
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+        retiring = list(_retiring)
+        _running.clear()
+        _retiring.clear()
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    for old in retiring:
+        _terminate(old)
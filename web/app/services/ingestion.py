@@ -0,0 +1,476 @@
+"""Column-wise normalization and bulk insert of uploaded transactions.
+
+Uploads are idempotent: every row gets a fingerprint backed by a unique
+index and is inserted with ON CONFLICT DO NOTHING, and the SHA-256 of every
+fully ingested file is recorded so the exact same file is not parsed twice.
+"""
+from __future__ import annotations
+
+import hashlib
+import zipfile
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import BinaryIO
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.lazy import lazy_module
+from app.database import dialect_insert
+from app.models import IngestedFile, Transaction
+from app.services.bulk_load import copy_supported, copy_transactions
+from app.services.data_version import bump_data_version
+from app.services.rollup import add_to_rollup
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+openpyxl = lazy_module("openpyxl")
+pa = lazy_module("pyarrow")
+pq = lazy_module("pyarrow.parquet")
+
+TYPE_ALIAS = {
+    "income": "income",
+    "expense": "expense",
+    "pendapatan": "income",
+    "pemasukan": "income",
+    "pengeluaran": "expense",
+    "beban": "expense",
+}
+
+REQUIRED_COLUMNS = {"date", "type", "category", "amount"}
+UPLOAD_SUFFIXES = (".csv", ".xlsx", ".parquet")
+INSERT_BATCH_ROWS = 5_000
+HASH_BLOCK_BYTES = 1024 * 1024
+XLSX_HEADER_SCAN_ROWS = 20
+# Table-level inserts skip the ORM bulk-insert bookkeeping, which dominates large uploads.
+TRANSACTIONS = Transaction.__table__
+
+
+class UploadError(ValueError):
+    """The uploaded file cannot be ingested; the message is shown to the user."""
+
+
+@dataclass
+class IngestResult:
+    chunks: int = 0
+    rows_read: int = 0
+    inserted: int = 0
+    skipped: int = 0
+    duplicates: int = 0
+    already_ingested: bool = False
+
+
+def normalize_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    frame.columns = [str(col).strip().lower() for col in frame.columns]
+    return frame
+
+
+def _wall_time(value: object) -> pd.Timestamp:
+    """`pd.to_datetime(value)` without its UTC offset, so the local calendar date is kept."""
+    try:
+        parsed = pd.to_datetime(value)
+    except (TypeError, ValueError, OverflowError):
+        return pd.NaT
+    return parsed.tz_localize(None) if parsed is not pd.NaT and parsed.tzinfo is not None else parsed
+
+
+def _to_wall_time(raw: pd.Series, **kwargs) -> pd.Series:
+    try:
+        parsed = pd.to_datetime(raw, errors="coerce", **kwargs)
+    except ValueError:
+        # Offsets that cannot share one dtype (several zones, or aware next to naive cells).
+        return pd.to_datetime(raw.map(_wall_time))
+    return parsed.dt.tz_localize(None) if parsed.dt.tz is not None else parsed
+
+
+def _parse_dates(raw: pd.Series) -> pd.Series:
+    # Fast path for ISO dates and datetime cells; anything else is parsed element-wise,
+    # the way a single `pd.to_datetime(value)` call would. Offsets are dropped rather than
+    # converted, matching `pd.to_datetime(value).date()`.
+    parsed = _to_wall_time(raw, format="ISO8601")
+    retry = parsed.isna() & raw.notna()
+    if retry.any():
+        parsed[retry] = _to_wall_time(raw[retry], format="mixed")
+    return parsed
+
+
+def normalize_transactions(frame: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Validate an upload frame column-wise.
+
+    Returns the valid rows as (date, type, category, amount, note) and the
+    number of skipped rows. A row is skipped when its type is not in
+    `TYPE_ALIAS`, its amount is not a positive finite number, its date does not
+    parse, or its category is blank.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=["date", "type", "category", "amount", "note"]), 0
+
+    tx_type = frame["type"].map(str).str.strip().str.lower().map(TYPE_ALIAS)
+    amount = pd.to_numeric(frame["amount"], errors="coerce")
+    tx_date = _parse_dates(frame["date"])
+    category = frame["category"].map(str).str.strip()
+
+    valid = (
+        tx_type.notna()
+        & np.isfinite(amount.to_numpy(dtype=np.float64, na_value=np.nan))
+        & (amount > 0)
+        & tx_date.notna()
+        & (category != "")
+    )
+
+    if "note" in frame.columns:
+        note = frame.loc[valid, "note"]
+        note = note.map(str).astype(object).where(note.notna(), None)
+    else:
+        note = pd.Series(None, index=frame.index[valid], dtype=object)
+
+    rows = pd.DataFrame(
+        {
+            "date": tx_date[valid].dt.normalize(),
+            "type": tx_type[valid],
+            "category": category[valid],
+            "amount": amount[valid].astype(np.float64),
+            "note": note,
+        }
+    )
+    return rows.reset_index(drop=True), int((~valid).sum())
+
+
+def record_inserted(db: Session, user_id: int, rows: pd.DataFrame) -> None:
+    """Keep derived state (monthly rollup, data version) in step with inserted rows."""
+    add_to_rollup(db, user_id, rows)
+    bump_data_version(db, user_id)
+
+
+class RowFingerprinter:
+    """Fingerprint the rows of one upload.
+
+    The fingerprint covers (user, date, type, category, amount, note) plus the
+    row's occurrence number among identical rows of the same file, so two
+    genuinely identical purchases in one export are both kept, while rows an
+    overlapping export repeats (whole days, as exports are cut by date) get the
+    same fingerprints and are not inserted again. Feed every chunk of the file
+    through one instance, in order.
+    """
+
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        # Occurrences so far per row key, keyed by a 64-bit hash of the key to bound memory.
+        self._seen: dict[int, int] = {}
+
+    def __call__(self, rows: pd.DataFrame) -> list[str]:
+        if rows.empty:
+            return []
+        keys = (
+            str(self.user_id)
+            + "\x1f" + pd.to_datetime(rows["date"]).dt.strftime("%Y-%m-%d")
+            + "\x1f" + rows["type"].astype(str)
+            + "\x1f" + rows["category"].astype(str)
+            + "\x1f" + rows["amount"].map("{:.2f}".format)
+            + "\x1f" + rows["note"].fillna("").astype(str)
+        ).to_numpy(dtype=object)
+
+        codes = pd.Series(pd.util.hash_array(keys))
+        occurrence = codes.groupby(codes).cumcount().to_numpy()
+        if self._seen:
+            occurrence = occurrence + codes.map(self._seen).fillna(0).to_numpy(dtype=np.int64)
+        for code, count in codes.value_counts().items():
+            self._seen[code] = self._seen.get(code, 0) + count
+
+        return [
+            hashlib.blake2b(f"{key}\x1f{n}".encode(), digest_size=16).hexdigest()
+            for key, n in zip(keys, occurrence.tolist())
+        ]
+
+
+def _executemany_transactions(db: Session, user_id: int, rows: pd.DataFrame) -> set[str] | None:
+    # Plain Python lists zipped into dicts: much cheaper than DataFrame.to_dict for executemany.
+    columns = {
+        "user_id": [user_id] * len(rows),
+        "type": rows["type"].to_numpy(dtype=object).tolist(),
+        "category": rows["category"].to_numpy(dtype=object).tolist(),
+        "amount": rows["amount"].to_numpy(dtype=np.float64).tolist(),
+        "date": pd.to_datetime(rows["date"]).to_numpy().astype("datetime64[D]").tolist(),
+        "note": rows["note"].to_numpy(dtype=object).tolist(),
+    }
+    if "fingerprint" in rows.columns:
+        columns["fingerprint"] = rows["fingerprint"].to_numpy(dtype=object).tolist()
+    records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+    if "fingerprint" not in columns:
+        for start in range(0, len(records), INSERT_BATCH_ROWS):
+            db.execute(insert(TRANSACTIONS), records[start : start + INSERT_BATCH_ROWS])
+        return None
+
+    stmt = (
+        dialect_insert(db)(TRANSACTIONS)
+        .on_conflict_do_nothing(index_elements=["user_id", "fingerprint"])
+        .returning(TRANSACTIONS.c.fingerprint)
+    )
+    inserted: set[str] = set()
+    for start in range(0, len(records), INSERT_BATCH_ROWS):
+        inserted.update(db.execute(stmt, records[start : start + INSERT_BATCH_ROWS]).scalars())
+    return inserted
+
+
+def insert_transactions(db: Session, user_id: int, rows: pd.DataFrame, use_copy: bool | None = None) -> int:
+    """Bulk-insert normalized rows; the caller commits.
+
+    On PostgreSQL (psycopg2) rows go through `COPY FROM STDIN` (see
+    `bulk_load`), elsewhere through Core `insert()` executemany batches;
+    `use_copy` overrides the choice. When `rows` has a `fingerprint` column,
+    rows whose fingerprint already exists for the user are skipped and left
+    out of the rollup. Returns the number of rows actually inserted.
+    """
+    if rows.empty:
+        return 0
+
+    if use_copy is None:
+        use_copy = settings.upload_copy_enabled and copy_supported(db)
+    inserted = (copy_transactions if use_copy else _executemany_transactions)(db, user_id, rows)
+
+    if inserted is None:
+        record_inserted(db, user_id, rows)
+        return len(rows)
+    if inserted:
+        mask = np.fromiter((fp in inserted for fp in rows["fingerprint"]), dtype=bool, count=len(rows))
+        record_inserted(db, user_id, rows[mask])
+    return len(inserted)
+
+
+def insert_transaction_records(db: Session, user_id: int, records: list[dict]) -> list[int]:
+    """Insert validated (type, category, amount, date, note) dicts; the caller commits.
+
+    Each chunk is one multi-row INSERT ... RETURNING id; ids come back in input order.
+    """
+    if not records:
+        return []
+
+    params = [{"user_id": user_id, **record} for record in records]
+    stmt = insert(TRANSACTIONS).returning(TRANSACTIONS.c.id, sort_by_parameter_order=True)
+    ids: list[int] = []
+    for start in range(0, len(params), INSERT_BATCH_ROWS):
+        ids.extend(db.execute(stmt, params[start : start + INSERT_BATCH_ROWS]).scalars())
+
+    record_inserted(db, user_id, pd.DataFrame.from_records(records, columns=["date", "type", "category", "amount"]))
+    return ids
+
+
+def check_upload_filename(filename: str) -> None:
+    if not (filename or "").lower().endswith(UPLOAD_SUFFIXES):
+        raise UploadError("File harus .csv, .xlsx, atau .parquet")
+
+
+def file_sha256(fileobj: BinaryIO) -> str:
+    """Hash a seekable file from the start and rewind it."""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    while block := fileobj.read(HASH_BLOCK_BYTES):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _header_index(rows: list[tuple]) -> int:
+    """Index of the first row naming every required column, else of the first non-empty row."""
+    for index, row in enumerate(rows):
+        names = {str(value).strip().lower() for value in row if value is not None}
+        if REQUIRED_COLUMNS.issubset(names):
+            return index
+    for index, row in enumerate(rows):
+        if any(value is not None for value in row):
+            return index
+    return 0
+
+
+def _header_names(row: tuple) -> list[str]:
+    return [f"Unnamed: {index}" if value is None else str(value).strip() for index, value in enumerate(row)]
+
+
+def iter_xlsx_frames(fileobj: BinaryIO, chunk_rows: int, sheet: str | None = None) -> Iterator[pd.DataFrame]:
+    """Stream an XLSX sheet with openpyxl's read-only mode, `chunk_rows` rows at a time.
+
+    `sheet` picks a sheet by name (default: the first one). The header is the
+    first of the top `XLSX_HEADER_SCAN_ROWS` rows that names every required
+    column, so title rows above the table in accounting exports are skipped.
+    Fully empty rows are dropped. Memory stays bounded by `chunk_rows`.
+    """
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except (openpyxl.utils.exceptions.InvalidFileException, zipfile.BadZipFile, KeyError) as exc:
+        raise UploadError("File .xlsx tidak valid atau rusak.") from exc
+
+    try:
+        if sheet is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet in workbook.sheetnames:
+            worksheet = workbook[sheet]
+        else:
+            raise UploadError(f"Sheet '{sheet}' tidak ditemukan. Sheet tersedia: {', '.join(workbook.sheetnames)}")
+        # Exports often carry a stale <dimension>; read whatever rows are actually present.
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+
+        head = list(islice(rows, XLSX_HEADER_SCAN_ROWS))
+        if not head:
+            # Still yield a frame so the required-column check reports the empty sheet.
+            yield pd.DataFrame()
+            return
+        header_at = _header_index(head)
+        columns = _header_names(head[header_at])
+        width = len(columns)
+
+        batch: list[tuple] = []
+        yielded = False
+        for row in chain(head[header_at + 1 :], rows):
+            if all(value is None for value in row):
+                continue
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+                yielded = True
+        if batch or not yielded:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_parquet_frames(fileobj: BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Read a Parquet file one record batch at a time; typed columns skip text parsing."""
+    try:
+        parquet = pq.ParquetFile(fileobj)
+    except (pa.ArrowException, OSError) as exc:
+        raise UploadError("File .parquet tidak valid atau rusak.") from exc
+
+    yielded = False
+    for batch in parquet.iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+        yielded = True
+    if not yielded:
+        yield parquet.schema_arrow.empty_table().to_pandas()
+
+
+def iter_upload_frames(
+    fileobj: BinaryIO,
+    filename: str,
+    chunk_rows: int,
+    sheet: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the upload as DataFrames of at most `chunk_rows` rows.
+
+    CSV is parsed incrementally from the (spooled) file object, XLSX is
+    streamed row by row and Parquet record batch by record batch, so memory use
+    is bounded by `chunk_rows` rather than by the file size. `sheet` only
+    applies to XLSX.
+    """
+    check_upload_filename(filename)
+    lower = filename.lower()
+    if lower.endswith(".csv"):
+        with pd.read_csv(fileobj, chunksize=chunk_rows) as reader:
+            yield from reader
+    elif lower.endswith(".parquet"):
+        yield from iter_parquet_frames(fileobj, chunk_rows)
+    else:
+        yield from iter_xlsx_frames(fileobj, chunk_rows, sheet)
+
+
+def _prepare_frame(frame: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    frame = normalize_columns(frame)
+    if not REQUIRED_COLUMNS.issubset(set(frame.columns)):
+        raise UploadError("Kolom wajib: date, type, category, amount")
+    return normalize_transactions(frame)
+
+
+def ingest_frame(
+    db: Session,
+    user_id: int,
+    frame: pd.DataFrame,
+    fingerprinter: RowFingerprinter | None = None,
+) -> tuple[int, int, int]:
+    """Validate and insert one frame; the caller commits. Returns (inserted, skipped, duplicates)."""
+    rows, skipped = _prepare_frame(frame)
+    if fingerprinter is not None:
+        rows["fingerprint"] = fingerprinter(rows)
+    inserted = insert_transactions(db, user_id, rows)
+    return inserted, skipped, len(rows) - inserted
+
+
+def ingest_frames(
+    db: Session,
+    user_id: int,
+    frames: Iterable[pd.DataFrame],
+    result: IngestResult | None = None,
+    on_chunk: Callable[[IngestResult], None] | None = None,
+) -> IngestResult:
+    """Ingest chunk by chunk, committing after each one.
+
+    `result` is updated in place, so a caller that catches an exception still
+    sees how many rows were committed before the failing chunk. A result
+    carried over from an interrupted run resumes after its last committed
+    chunk; earlier chunks are only fingerprinted, to keep occurrence numbers
+    stable. `on_chunk` runs inside each chunk's transaction, just before commit.
+    """
+    result = result if result is not None else IngestResult()
+    fingerprinter = RowFingerprinter(user_id)
+    for index, frame in enumerate(frames):
+        if index < result.chunks:
+            fingerprinter(_prepare_frame(frame)[0])
+            continue
+        inserted, skipped, duplicates = ingest_frame(db, user_id, frame, fingerprinter)
+        result.chunks += 1
+        result.rows_read += len(frame)
+        result.inserted += inserted
+        result.skipped += skipped
+        result.duplicates += duplicates
+        if on_chunk is not None:
+            on_chunk(result)
+        db.commit()
+    return result
+
+
+def ingest_file(
+    db: Session,
+    user_id: int,
+    fileobj: BinaryIO,
+    filename: str,
+    chunk_rows: int,
+    result: IngestResult | None = None,
+    on_chunk: Callable[[IngestResult], None] | None = None,
+    file_hash: str | None = None,
+    sheet: str | None = None,
+) -> IngestResult:
+    """Ingest a whole upload, short-circuiting a file this user already ingested in full.
+
+    Pass `file_hash` when the SHA-256 is already known to avoid hashing twice.
+    Each XLSX sheet counts as its own file.
+    """
+    check_upload_filename(filename)
+    result = result if result is not None else IngestResult()
+    file_hash = file_hash or file_sha256(fileobj)
+    if sheet is not None:
+        file_hash = hashlib.sha256(f"{file_hash}:{sheet}".encode()).hexdigest()
+
+    previous = db.get(IngestedFile, (user_id, file_hash))
+    if previous is not None:
+        result.already_ingested = True
+        result.skipped = previous.skipped_rows
+        result.duplicates = previous.rows_read - previous.skipped_rows
+        return result
+
+    with closing(iter_upload_frames(fileobj, filename, chunk_rows, sheet)) as frames:
+        ingest_frames(db, user_id, frames, result=result, on_chunk=on_chunk)
+
+    stmt = dialect_insert(db)(IngestedFile).values(
+        user_id=user_id,
+        file_hash=file_hash,
+        filename=filename[:255],
+        rows_read=result.rows_read,
+        skipped_rows=result.skipped,
+    )
+    db.execute(stmt.on_conflict_do_nothing(index_elements=["user_id", "file_hash"]))
+    db.commit()
+    return result
@@ -0,0 +1,194 @@
+"""Background upload ingestion.
+
+The upload endpoint stores the file under `UPLOAD_JOB_DIR`, records an
+`IngestionJob` and returns right away; a local thread pool does the work.
+Job counters are committed in the same transaction as each ingested chunk, so
+a job interrupted by a restart is picked up by `resume_pending_jobs` and
+continues after its last committed chunk instead of inserting rows twice.
+Every process (each uvicorn worker or instance) claims a job atomically before
+running it, so a job runs in one place at a time; a running job is taken over
+only once its progress is older than `UPLOAD_JOB_LEASE_SECONDS`.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import IngestionJob
+from app.services.ingestion import HASH_BLOCK_BYTES, IngestResult, UploadError, check_upload_filename, ingest_file
+
+PENDING_STATUSES = ("queued", "running")
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"[:100]
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.upload_job_workers, thread_name_prefix="ingest")
+        return _executor
+
+
+def create_job(
+    db: Session,
+    user_id: int,
+    fileobj: BinaryIO,
+    filename: str,
+    sheet: str | None = None,
+) -> IngestionJob:
+    """Copy the upload to disk and record a queued job; call `submit_job` after commit."""
+    check_upload_filename(filename)
+    directory = Path(settings.upload_job_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+    digest = hashlib.sha256()
+    with path.open("wb") as out:
+        while block := fileobj.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+            out.write(block)
+
+    job = IngestionJob(
+        user_id=user_id,
+        filename=filename,
+        file_path=str(path),
+        file_hash=digest.hexdigest(),
+        sheet=sheet,
+        status="queued",
+        chunk_rows=settings.upload_chunk_rows,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def submit_job(job_id: int) -> None:
+    _pool().submit(run_job, job_id)
+
+
+def _finish(db: Session, job: IngestionJob, status: str, error: str | None = None) -> None:
+    job.status = status
+    job.error = error
+    job.finished_at = dt.datetime.utcnow()
+    db.commit()
+    Path(job.file_path).unlink(missing_ok=True)
+
+
+def claim_job(db: Session, job_id: int) -> bool:
+    """Mark a job running for this process if it is queued, or running without recent progress.
+
+    One conditional UPDATE, so of all processes trying to claim the same job
+    exactly one sees its row updated.
+    """
+    now = dt.datetime.utcnow()
+    stale = now - dt.timedelta(seconds=settings.upload_job_lease_seconds)
+    claimed = db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            or_(
+                IngestionJob.status == "queued",
+                and_(
+                    IngestionJob.status == "running",
+                    or_(IngestionJob.heartbeat_at.is_(None), IngestionJob.heartbeat_at < stale),
+                ),
+            ),
+        )
+        .values(
+            status="running",
+            claimed_by=WORKER_ID,
+            heartbeat_at=now,
+            started_at=func.coalesce(IngestionJob.started_at, now),
+        )
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def run_job(job_id: int) -> None:
+    """Process one job to completion unless another process holds it; safe to call again for an interrupted job."""
+    with SessionLocal() as db:
+        if not claim_job(db, job_id):
+            return
+        job = db.get(IngestionJob, job_id)
+
+        progress = IngestResult(
+            chunks=job.chunks,
+            rows_read=job.rows_read,
+            inserted=job.inserted_rows,
+            skipped=job.skipped_rows,
+            duplicates=job.duplicate_rows,
+        )
+
+        def save_progress(result: IngestResult) -> None:
+            job.chunks = result.chunks
+            job.rows_read = result.rows_read
+            job.inserted_rows = result.inserted
+            job.skipped_rows = result.skipped
+            job.duplicate_rows = result.duplicates
+            job.heartbeat_at = dt.datetime.utcnow()
+
+        try:
+            with open(job.file_path, "rb") as fileobj:
+                ingest_file(
+                    db,
+                    job.user_id,
+                    fileobj,
+                    job.filename,
+                    job.chunk_rows,
+                    result=progress,
+                    on_chunk=save_progress,
+                    file_hash=job.file_hash,
+                    sheet=job.sheet,
+                )
+        except UploadError as exc:
+            db.rollback()
+            _finish(db, job, "failed", str(exc))
+        except Exception as exc:
+            db.rollback()
+            _finish(db, job, "failed", f"Gagal memproses file: {exc}")
+        else:
+            save_progress(progress)
+            _finish(db, job, "done")
+
+
+def resume_pending_jobs() -> int:
+    """Re-queue jobs left queued or running by a previous process. Returns how many.
+
+    Jobs another live process is running are submitted too; `run_job` skips them when its claim fails.
+    """
+    with SessionLocal() as db:
+        job_ids = list(
+            db.scalars(
+                select(IngestionJob.id)
+                .where(IngestionJob.status.in_(PENDING_STATUSES))
+                .order_by(IngestionJob.id.asc())
+            ).all()
+        )
+    for job_id in job_ids:
+        submit_job(job_id)
+    return len(job_ids)
+
+
+def shutdown_workers() -> None:
+    """Stop the pool without waiting; unfinished jobs stay pending and resume on next start."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
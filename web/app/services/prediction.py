@@ -1,73 +1,361 @@
 from __future__ import annotations
 
+import importlib.util
 from datetime import date
 
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-
+from app.core.config import settings
+from app.core.lazy import lazy_module
 from app.services.analytics import monthly_cash_flow
+from app.services.forecast_pool import run_fit
+from app.services.trend import fit_trends, forecast_trend, forecast_trends, pad_series
 
-try:
-    from statsmodels.tsa.arima.model import ARIMA
-except Exception:  # pragma: no cover - optional import at runtime
-    ARIMA = None
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+# statsmodels is imported by the process that fits ARIMA (a forecast pool
+# worker), never at import time; here we only check that it is installed.
+ARIMA_AVAILABLE = importlib.util.find_spec("statsmodels") is not None
 
+FORECAST_MODELS = ("linear", "arima")
+FORECAST_HORIZONS = range(3, 13)
 
-def _month_starts(last_month: pd.Timestamp, horizon: int) -> list[date]:
+
+def month_starts(last_month: pd.Timestamp, horizon: int) -> list[date]:
     return [
         (last_month + pd.DateOffset(months=i)).to_period("M").to_timestamp().date()
         for i in range(1, horizon + 1)
     ]
 
 
+# `ar.L1`, `ma.L1` and the in-sample residuals of an ARIMA(1,1,1) fit: what its intervals are bootstrapped from.
+# A string, so defining the alias does not import numpy.
+ArimaResiduals = tuple[float, float, "np.ndarray"]
+
+
+def _arima_fit(y: np.ndarray, horizon_months: int) -> tuple[np.ndarray, ArimaResiduals]:
+    """Fit ARIMA(1,1,1) once for both its forecast and its residual model; runs in a `forecast_pool` worker."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    fit = ARIMA(y, order=(1, 1, 1)).fit()
+    params = dict(zip(fit.model.param_names, np.asarray(fit.params).tolist(), strict=True))
+    # The first residual is the undifferenced first value, not a forecast error.
+    residuals = (params["ar.L1"], params["ma.L1"], np.asarray(fit.resid)[1:])
+    return np.asarray(fit.forecast(steps=horizon_months)), residuals
+
+
+def _arima_forecast(y: np.ndarray, horizon_months: int) -> np.ndarray:
+    """`_arima_fit`'s forecast alone."""
+    return _arima_fit(y, horizon_months)[0]
+
+
+def naive_forecast(y: np.ndarray, horizon_months: int) -> np.ndarray:
+    """Every future month equals the last observed one."""
+    return np.full(horizon_months, float(y[-1]))
+
+
+SEASON_MONTHS = 12
+
+
+def seasonal_naive_forecast(y: np.ndarray, horizon_months: int) -> np.ndarray:
+    """Every future month equals the same month one year earlier."""
+    season = np.asarray(y[-SEASON_MONTHS:], dtype=np.float64)
+    return season[np.arange(horizon_months) % SEASON_MONTHS]
+
+
+SMOOTHING_ALPHAS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+
+def _smoothing_fit(y: np.ndarray) -> tuple[float, float, np.ndarray]:
+    """Alpha with the lowest one-step-ahead squared error, the final level, and that alpha's one-step errors."""
+    y = np.asarray(y, dtype=np.float64)
+    alphas = np.array(SMOOTHING_ALPHAS)
+    level = np.full(len(alphas), y[0])
+    sse = np.zeros(len(alphas))
+    errors = np.empty((len(y) - 1, len(alphas)))
+    for step, value in enumerate(y[1:]):
+        error = value - level
+        errors[step] = error
+        sse += error * error
+        level = level + alphas * error
+    best = int(np.argmin(sse))
+    return float(alphas[best]), float(level[best]), errors[:, best]
+
+
+def exponential_smoothing_forecast(y: np.ndarray, horizon_months: int) -> np.ndarray:
+    """Simple exponential smoothing; alpha is the grid value with the lowest one-step-ahead squared error."""
+    _, level, _ = _smoothing_fit(y)
+    return np.full(horizon_months, level)
+
+
+# Forecasters by the model name reported as `model_used`, with the fewest months each can be fitted on.
+FORECASTERS = {
+    "linear_regression": (forecast_trend, 2),
+    "arima": (_arima_forecast, 6),
+    "naive": (naive_forecast, 1),
+    "seasonal_naive": (seasonal_naive_forecast, SEASON_MONTHS),
+    "exponential_smoothing": (exponential_smoothing_forecast, 2),
+}
+MODEL_ALIASES = {"linear": "linear_regression"}
+
+
 def predict_cash_flow(
     transactions_df: pd.DataFrame,
     horizon_months: int = 6,
     model: str = "linear",
+    intervals: bool = False,
 ) -> tuple[str, list[dict[str, float | date]], int]:
-    if horizon_months < 3 or horizon_months > 12:
-        raise ValueError("horizon_months harus antara 3 dan 12.")
+    return predict_from_monthly(
+        monthly_cash_flow(transactions_df), horizon_months=horizon_months, model=model, intervals=intervals
+    )
 
-    monthly = monthly_cash_flow(transactions_df)
-    if monthly.empty or len(monthly) < 2:
-        raise ValueError("Data transaksi belum cukup untuk prediksi.")
 
-    y = monthly["net_cash_flow"].astype(float).to_numpy()
-    future_months = _month_starts(monthly.iloc[-1]["month"], horizon_months)
+def _forecast(
+    y: np.ndarray, horizon_months: int, model: str, fit=run_fit
+) -> tuple[str, np.ndarray, ArimaResiduals | None]:
+    """Fitted model name, forecast and, for ARIMA, its residual model; any model falls back to
+    linear regression when it cannot be fitted.
 
-    used_model = "linear_regression"
-    predictions: np.ndarray
+    `model` is a `FORECASTERS` name or alias. `fit(fn, *args)` runs the ARIMA
+    fit; by default in the forecast pool.
+    """
+    model = MODEL_ALIASES.get(model, model)
+    if model == "arima" and ARIMA_AVAILABLE and len(y) >= FORECASTERS["arima"][1]:
+        try:
+            return "arima", *fit(_arima_fit, y, horizon_months)
+        except Exception:
+            pass
+    elif model in FORECASTERS and model != "arima" and len(y) >= FORECASTERS[model][1]:
+        forecaster, _ = FORECASTERS[model]
+        return model, forecaster(y, horizon_months), None
+    return "linear_regression", forecast_trend(y, horizon_months), None
 
-    if model == "arima":
-        if ARIMA is None or len(y) < 6:
-            x = np.arange(len(y)).reshape(-1, 1)
-            x_future = np.arange(len(y), len(y) + horizon_months).reshape(-1, 1)
-            reg = LinearRegression()
-            reg.fit(x, y)
-            predictions = reg.predict(x_future)
-        else:
-            try:
-                arima_model = ARIMA(y, order=(1, 1, 1))
-                fit = arima_model.fit()
-                predictions = fit.forecast(steps=horizon_months)
-                used_model = "arima"
-            except Exception:
-                x = np.arange(len(y)).reshape(-1, 1)
-                x_future = np.arange(len(y), len(y) + horizon_months).reshape(-1, 1)
-                reg = LinearRegression()
-                reg.fit(x, y)
-                predictions = reg.predict(x_future)
-    else:
-        x = np.arange(len(y)).reshape(-1, 1)
-        x_future = np.arange(len(y), len(y) + horizon_months).reshape(-1, 1)
-        reg = LinearRegression()
-        reg.fit(x, y)
-        predictions = reg.predict(x_future)
 
+def arima_residuals(y: np.ndarray, horizon_months: int) -> ArimaResiduals | None:
+    """Residual model of an ARIMA forecast fitted earlier (cached or precomputed); None if the refit fails."""
+    try:
+        return run_fit(_arima_fit, y, horizon_months)[1]
+    except Exception:
+        return None
+
+
+INSUFFICIENT_DATA = "Data transaksi belum cukup untuk prediksi."
+
+
+def cash_flow_series(monthly: pd.DataFrame) -> np.ndarray:
+    """Net cash flow per month as floats; raises ValueError when there is too little history to forecast."""
+    if monthly.empty or len(monthly) < 2:
+        raise ValueError(INSUFFICIENT_DATA)
+    return monthly["net_cash_flow"].astype(float).to_numpy()
+
+
+def _result(
+    used_model: str,
+    future_months: list[date],
+    predictions: np.ndarray,
+) -> tuple[str, list[dict[str, float | date]], int]:
     points = [
         {"month": m, "predicted_cash_flow": round(float(v), 2)}
         for m, v in zip(future_months, predictions.tolist(), strict=True)
     ]
     deficit_risk = int(sum(1 for point in points if point["predicted_cash_flow"] < 0))
     return used_model, points, deficit_risk
+
+
+INTERVAL_PERCENTILES = {"p10": 10, "p50": 50, "p90": 90}
+INTERVALS_UNAVAILABLE = "Interval prediksi tidak tersedia: residual model belum cukup untuk disimulasikan."
+
+
+def _resample(residuals: np.ndarray, rng: np.random.Generator, shape: tuple[int, int]) -> np.ndarray:
+    # Centred, so the band is spread around the model's forecast rather than shifted by in-sample bias.
+    centred = residuals - residuals.mean()
+    return centred[rng.integers(len(centred), size=shape)]
+
+
+def _trend_deviations(y: np.ndarray, horizon: int, paths: int, rng: np.random.Generator) -> np.ndarray:
+    """Trend residuals resampled into pseudo-histories: each path shifts by how far the trend
+    refitted to its pseudo-history moves, plus a fresh residual per month. Parameter
+    uncertainty widens the band with the horizon, residual noise sets its floor.
+    """
+    months = len(y)
+    slope, intercept = fit_trends(y[None, :], np.full(1, months))
+    x_centered = np.arange(months) - (months - 1) / 2
+    residuals = y - (intercept[0] + slope[0] * np.arange(months))
+    if months > 2:
+        # Undo the shrinkage of in-sample residuals from the two fitted parameters.
+        residuals *= np.sqrt(months / (months - 2))
+
+    # A least-squares refit is linear in the data, so the refitted trend of
+    # (fitted + e) moves from the original by e @ weights: one matrix product
+    # for all paths instead of a refit per path.
+    future_centered = np.arange(months, months + horizon) - (months - 1) / 2
+    weights = 1 / months + np.outer(x_centered, future_centered) / (x_centered @ x_centered)
+    draws = _resample(residuals, rng, (paths, months + horizon))
+    return draws[:, :months] @ weights + draws[:, months:]
+
+
+def _naive_deviations(y: np.ndarray, horizon: int, paths: int, rng: np.random.Generator) -> np.ndarray:
+    """Month-to-month changes, accumulated: the naive forecast is a random walk."""
+    return np.cumsum(_resample(np.diff(y), rng, (paths, horizon)), axis=1)
+
+
+def _seasonal_naive_deviations(y: np.ndarray, horizon: int, paths: int, rng: np.random.Generator) -> np.ndarray | None:
+    """Year-over-year changes; every forecast month (up to 12) is one season ahead."""
+    residuals = y[SEASON_MONTHS:] - y[:-SEASON_MONTHS]
+    if not len(residuals):
+        return None
+    return _resample(residuals, rng, (paths, horizon))
+
+
+def _smoothing_deviations(y: np.ndarray, horizon: int, paths: int, rng: np.random.Generator) -> np.ndarray:
+    """One-step errors fed through the smoothing recursion: month k moves by e_k + alpha * (e_1 + ... + e_k-1)."""
+    alpha, _, errors = _smoothing_fit(y)
+    draws = _resample(errors, rng, (paths, horizon))
+    return draws + alpha * (np.cumsum(draws, axis=1) - draws)
+
+
+def _arima_deviations(
+    residual_model: ArimaResiduals, horizon: int, paths: int, rng: np.random.Generator
+) -> np.ndarray | None:
+    """Residuals fed through the fitted ARIMA(1,1,1) recursion of the monthly change, then accumulated."""
+    ar, ma, residuals = residual_model
+    if not len(residuals):
+        return None
+    draws = _resample(residuals, rng, (paths, horizon))
+    changes = np.empty_like(draws)
+    changes[:, 0] = draws[:, 0]
+    for month in range(1, horizon):
+        changes[:, month] = ar * changes[:, month - 1] + draws[:, month] + ma * draws[:, month - 1]
+    return np.cumsum(changes, axis=1)
+
+
+# How each model's own in-sample residuals turn into deviations from its point forecast.
+_DEVIATIONS = {
+    "linear_regression": _trend_deviations,
+    "naive": _naive_deviations,
+    "seasonal_naive": _seasonal_naive_deviations,
+    "exponential_smoothing": _smoothing_deviations,
+}
+
+
+def bootstrap_paths(
+    y: np.ndarray,
+    predictions: np.ndarray,
+    paths: int,
+    model: str = "linear_regression",
+    seed: int = 0,
+    arima: ArimaResiduals | None = None,
+) -> np.ndarray | None:
+    """Simulated future cash flows around `predictions` by residual bootstrap; shape (paths, horizon).
+
+    `model` is the `model_used` that produced `predictions`; its own in-sample
+    residuals are resampled (see `_DEVIATIONS`). ARIMA's come from the fit
+    that produced `predictions` (`arima`) rather than a refit. None when the
+    model has no residuals to resample. The fixed seed keeps repeated requests
+    (and cached results) identical.
+    """
+    rng = np.random.default_rng(seed)
+    if model == "arima":
+        deviations = None if arima is None else _arima_deviations(arima, len(predictions), paths, rng)
+    else:
+        deviations = _DEVIATIONS[model](np.asarray(y, dtype=np.float64), len(predictions), paths, rng)
+    if deviations is None:
+        return None
+    return np.asarray(predictions, dtype=np.float64) + deviations
+
+
+def add_intervals(
+    y: np.ndarray,
+    points: list[dict[str, float | date]],
+    model: str = "linear_regression",
+    paths: int | None = None,
+    arima: ArimaResiduals | None = None,
+) -> list[dict[str, float | date]] | None:
+    """`points` with P10/P50/P90 bands and the probability of a negative cash flow per month.
+
+    None when `model`'s residuals cannot be bootstrapped (`INTERVALS_UNAVAILABLE`).
+    """
+    predictions = np.array([point["predicted_cash_flow"] for point in points])
+    paths = settings.forecast_interval_paths if paths is None else paths
+    simulated = bootstrap_paths(y, predictions, paths, model, arima=arima)
+    if simulated is None:
+        return None
+    bands = np.percentile(simulated, list(INTERVAL_PERCENTILES.values()), axis=0).round(2)
+    deficit_probability = (simulated < 0).mean(axis=0).round(4)
+    return [
+        {
+            **point,
+            **dict(zip(INTERVAL_PERCENTILES, bands[:, month].tolist(), strict=True)),
+            "deficit_probability": float(deficit_probability[month]),
+        }
+        for month, point in enumerate(points)
+    ]
+
+
+def predict_from_monthly(
+    monthly: pd.DataFrame,
+    horizon_months: int = 6,
+    model: str = "linear",
+    intervals: bool = False,
+) -> tuple[str, list[dict[str, float | date]], int]:
+    """Forecast from a `monthly_cash_flow`-shaped frame (pandas- or SQL-aggregated).
+
+    With `intervals`, each point also carries its bootstrap band (`add_intervals`)
+    when the model's residuals allow it.
+    """
+    if horizon_months < 3 or horizon_months > 12:
+        raise ValueError("horizon_months harus antara 3 dan 12.")
+
+    y = cash_flow_series(monthly)
+    used_model, predictions, arima = _forecast(y, horizon_months, model)
+    used_model, points, deficit_risk = _result(used_model, month_starts(monthly.iloc[-1]["month"], horizon_months), predictions)
+    if intervals:
+        points = add_intervals(y, points, used_model, arima=arima) or points
+    return used_model, points, deficit_risk
+
+
+def predict_all_horizons(
+    monthly: pd.DataFrame,
+    models: tuple[str, ...] = FORECAST_MODELS,
+    horizons: range = FORECAST_HORIZONS,
+) -> dict[tuple[str, int], tuple[str, list[dict[str, float | date]], int]]:
+    """`predict_from_monthly` for every (model, horizon), fitting each model once.
+
+    Forecasts of both models are recursive, so a shorter horizon is a prefix of
+    the longest one. ARIMA is fitted in the calling process: this is meant for
+    batch workers that are already out of the request path.
+    """
+    y = cash_flow_series(monthly)
+    longest = max(horizons)
+    future_months = month_starts(monthly.iloc[-1]["month"], longest)
+    results = {}
+    for model in models:
+        used_model, predictions, _ = _forecast(y, longest, model, fit=lambda fn, *args: fn(*args))
+        for horizon in horizons:
+            results[(model, horizon)] = _result(used_model, future_months[:horizon], predictions[:horizon])
+    return results
+
+
+def predict_linear_batch(
+    monthlies: list[pd.DataFrame],
+    horizons: range = FORECAST_HORIZONS,
+) -> list[dict[tuple[str, int], tuple[str, list[dict[str, float | date]], int]] | str]:
+    """Linear forecasts of many users, fitted together as one padded matrix.
+
+    One entry per frame: `predict_all_horizons(monthly, models=("linear",))`,
+    with identical numbers, or the error message when the data is insufficient.
+    """
+    longest = max(horizons)
+    usable = [index for index, monthly in enumerate(monthlies) if not monthly.empty and len(monthly) >= 2]
+    results: list = [INSUFFICIENT_DATA] * len(monthlies)
+    if not usable:
+        return results
+
+    matrix, lengths = pad_series([monthlies[index]["net_cash_flow"].astype(float).to_numpy() for index in usable])
+    forecasts = forecast_trends(matrix, lengths, longest)
+    for index, predictions in zip(usable, forecasts, strict=True):
+        future_months = month_starts(monthlies[index].iloc[-1]["month"], longest)
+        results[index] = {
+            ("linear", horizon): _result("linear_regression", future_months[:horizon], predictions[:horizon])
+            for horizon in horizons
+        }
+    return results
@@ -0,0 +1,180 @@
+"""Prediction history as runs: one `PredictionRun` plus its points per distinct forecast.
+
+A run is written only when the forecast served for (user, model, horizon)
+differs from the latest recorded one, so repeated dashboard refreshes write
+nothing. `compact_prediction_history` collapses duplicates that are already
+stored, both in `prediction_runs` and in the legacy `predictions` table.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import itertools
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models import Prediction, PredictionRun, PredictionRunPoint
+
+DELETE_BATCH = 500
+
+
+def _latest_run_points(db: Session, user_id: int, model_type: str, horizon_months: int) -> tuple[int, list] | None:
+    run = db.execute(
+        select(PredictionRun.id, PredictionRun.data_version)
+        .where(
+            PredictionRun.user_id == user_id,
+            PredictionRun.model_type == model_type,
+            PredictionRun.horizon_months == horizon_months,
+        )
+        .order_by(PredictionRun.data_version.desc(), PredictionRun.id.desc())
+        .limit(1)
+    ).first()
+    if run is None:
+        return None
+    points = db.execute(
+        select(PredictionRunPoint.month, PredictionRunPoint.predicted_value)
+        .where(PredictionRunPoint.run_id == run.id)
+        .order_by(PredictionRunPoint.month)
+    ).all()
+    return run.data_version, [(month, round(float(value), 2)) for month, value in points]
+
+
+def record_prediction_run(
+    db: Session,
+    user_id: int,
+    data_version: int,
+    model_type: str,
+    points: list[dict[str, float | date]],
+    deficit_risk_months: int,
+) -> bool:
+    """Record a served forecast unless it matches the latest run; the caller commits.
+
+    Returns whether a run was written. Concurrent writers of the same data
+    version are deduplicated by the unique (user, model, horizon, version) index.
+    """
+    horizon_months = len(points)
+    latest = _latest_run_points(db, user_id, model_type, horizon_months)
+    if latest is not None:
+        latest_version, latest_points = latest
+        if latest_version >= data_version:
+            return False
+        if latest_points == [(point["month"], point["predicted_cash_flow"]) for point in points]:
+            return False
+
+    stmt = (
+        dialect_insert(db)(PredictionRun)
+        .values(
+            user_id=user_id,
+            model_type=model_type,
+            horizon_months=horizon_months,
+            data_version=data_version,
+            deficit_risk_months=deficit_risk_months,
+            created_at=dt.datetime.utcnow(),
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "model_type", "horizon_months", "data_version"])
+        .returning(PredictionRun.id)
+    )
+    run_id = db.scalar(stmt)
+    if run_id is None:
+        return False
+    db.execute(
+        insert(PredictionRunPoint),
+        [
+            {"run_id": run_id, "month": point["month"], "predicted_value": point["predicted_cash_flow"]}
+            for point in points
+        ],
+    )
+    return True
+
+
+@dataclass
+class CompactionResult:
+    duplicate_runs: int = 0
+    expired_runs: int = 0
+    legacy_rows: int = 0
+
+
+def _delete_runs(db: Session, run_ids: Iterable[int]) -> int:
+    deleted = 0
+    run_ids = iter(run_ids)
+    while batch := list(itertools.islice(run_ids, DELETE_BATCH)):
+        # Explicit, because SQLite does not enforce ON DELETE CASCADE by default.
+        db.execute(delete(PredictionRunPoint).where(PredictionRunPoint.run_id.in_(batch)))
+        deleted += db.execute(delete(PredictionRun).where(PredictionRun.id.in_(batch))).rowcount
+    return deleted
+
+
+def _duplicate_run_ids(db: Session) -> list[int]:
+    """Runs whose points equal the previous run of the same (user, model, horizon); the earliest is kept."""
+    rows = db.execute(
+        select(
+            PredictionRun.id,
+            PredictionRun.user_id,
+            PredictionRun.model_type,
+            PredictionRun.horizon_months,
+            PredictionRunPoint.month,
+            PredictionRunPoint.predicted_value,
+        )
+        .join(PredictionRunPoint, PredictionRunPoint.run_id == PredictionRun.id)
+        .order_by(
+            PredictionRun.user_id,
+            PredictionRun.model_type,
+            PredictionRun.horizon_months,
+            PredictionRun.data_version,
+            PredictionRun.id,
+            PredictionRunPoint.month,
+        )
+        .execution_options(yield_per=10_000)
+    )
+    duplicates: list[int] = []
+    previous_key = previous_points = None
+    for run_id, run_rows in itertools.groupby(rows, key=lambda row: row.id):
+        run_rows = list(run_rows)
+        key = (run_rows[0].user_id, run_rows[0].model_type, run_rows[0].horizon_months)
+        points = [(row.month, row.predicted_value) for row in run_rows]
+        if key == previous_key and points == previous_points:
+            duplicates.append(run_id)
+            continue
+        previous_key, previous_points = key, points
+    return duplicates
+
+
+def _expired_run_ids(db: Session, cutoff: dt.datetime) -> list[int]:
+    """Runs created before `cutoff`, except the newest run of each (user, model, horizon)."""
+    newest = (
+        select(func.max(PredictionRun.id))
+        .group_by(PredictionRun.user_id, PredictionRun.model_type, PredictionRun.horizon_months)
+        .scalar_subquery()
+    )
+    return list(
+        db.scalars(select(PredictionRun.id).where(PredictionRun.created_at < cutoff, PredictionRun.id.not_in(newest)))
+    )
+
+
+def _compact_legacy_predictions(db: Session) -> int:
+    """Keep one legacy row per (user, month, model, value); the per-request copies are dropped."""
+    kept = (
+        select(func.min(Prediction.id))
+        .group_by(Prediction.user_id, Prediction.month, Prediction.model_type, Prediction.predicted_value)
+        .scalar_subquery()
+    )
+    return db.execute(delete(Prediction).where(Prediction.id.not_in(kept))).rowcount
+
+
+def compact_prediction_history(db: Session, keep_days: int | None = None) -> CompactionResult:
+    """Collapse duplicate runs and legacy rows, and optionally expire old runs; the caller commits.
+
+    With `keep_days`, runs older than that many days are deleted too, except
+    the newest run of each (user, model, horizon).
+    """
+    result = CompactionResult()
+    result.duplicate_runs = _delete_runs(db, _duplicate_run_ids(db))
+    if keep_days is not None:
+        cutoff = dt.datetime.utcnow() - dt.timedelta(days=keep_days)
+        result.expired_runs = _delete_runs(db, _expired_run_ids(db, cutoff))
+    result.legacy_rows = _compact_legacy_predictions(db)
+    return result
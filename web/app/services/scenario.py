@@ -0,0 +1,152 @@
+"""Monte Carlo what-if simulation of the monthly cash flow.
+
+A scenario scales revenue, all expenses and individual expense categories by
+a percentage and adds one-off expenses in given forecast months. The user's
+history (monthly revenue from `monthly_cash_flow` and the per-category monthly
+expenses that expense intelligence groups by) is first re-weighted by the
+scenario. Each component's trend is extrapolated and clipped at zero, and
+`prediction.bootstrap_paths` simulates cash-flow paths around the summed
+baseline. Resampling whole months of the re-weighted history keeps the
+co-movement of revenue and categories. Balances start from `starting_cash`,
+by default the cumulative historical net cash flow.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date
+
+from app.core.config import settings
+from app.core.lazy import lazy_module
+from app.services.analytics import AnalyticsBundle
+from app.services.prediction import INSUFFICIENT_DATA, INTERVAL_PERCENTILES, bootstrap_paths, month_starts
+from app.services.trend import forecast_trends
+
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
+
+
+@dataclass
+class Scenario:
+    horizon_months: int = 6
+    revenue_change_pct: float = 0.0
+    expense_change_pct: float = 0.0
+    # Expense category -> % change, applied on top of `expense_change_pct`.
+    category_changes: dict[str, float] = field(default_factory=dict)
+    # Forecast month (1 = next month) -> one-off expense amount.
+    one_off_expenses: dict[int, float] = field(default_factory=dict)
+    starting_cash: float | None = None
+
+    def scenario_hash(self) -> str:
+        """Stable digest of the scenario; equal scenarios share a cache entry however they were spelled."""
+        canonical = json.dumps(asdict(self), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+@dataclass
+class ScenarioInputs:
+    """A user's history in the shape the simulation needs; independent of the scenario."""
+
+    last_month: pd.Timestamp
+    revenue: np.ndarray
+    categories: list[str]
+    # (len(categories), months) expense sums, zero where a category had no expense.
+    expenses: np.ndarray
+
+    @classmethod
+    def from_bundle(cls, bundle: AnalyticsBundle) -> ScenarioInputs:
+        monthly = bundle.monthly
+        if monthly.empty or len(monthly) < 2:
+            raise ValueError(INSUFFICIENT_DATA)
+
+        months = pd.to_datetime(monthly["month"])
+        by_category = bundle.monthly_expense_by_category
+        expenses = (
+            by_category.assign(month=pd.to_datetime(by_category["month"]))
+            .pivot_table(index="category", columns="month", values="amount", aggfunc="sum")
+            .reindex(columns=months)
+            .fillna(0.0)
+        )
+        return cls(
+            last_month=months.iloc[-1],
+            revenue=monthly["revenue"].astype(float).to_numpy(),
+            categories=[str(category) for category in expenses.index],
+            expenses=expenses.to_numpy(dtype=np.float64).reshape(len(expenses), len(months)),
+        )
+
+    @property
+    def net_total(self) -> float:
+        return float(self.revenue.sum() - self.expenses.sum())
+
+
+def _signed_weights(inputs: ScenarioInputs, scenario: Scenario) -> np.ndarray:
+    """Per component (revenue, then each category) multiplier, negative for expenses."""
+    unknown = sorted(set(scenario.category_changes) - set(inputs.categories))
+    if unknown:
+        raise ValueError(f"Kategori pengeluaran tidak ditemukan: {', '.join(unknown)}.")
+
+    expense_factor = 1 + scenario.expense_change_pct / 100
+    category_factors = np.array([1 + scenario.category_changes.get(name, 0.0) / 100 for name in inputs.categories])
+    return np.concatenate(([1 + scenario.revenue_change_pct / 100], -expense_factor * category_factors))
+
+
+def _runway(cash_out: np.ndarray, quantile: float) -> int | None:
+    """Months until the balance first goes negative on the `quantile` path; None if beyond the horizon."""
+    first = np.where(cash_out[:, -1], cash_out.argmax(axis=1) + 1, cash_out.shape[1] + 1)
+    months = int(np.quantile(first, quantile, method="lower"))
+    return months if months <= cash_out.shape[1] else None
+
+
+def simulate_scenario(inputs: ScenarioInputs, scenario: Scenario, paths: int | None = None) -> dict:
+    """Percentiles of net cash flow and balance per month, deficit/cash-out probabilities and runway."""
+    horizon = scenario.horizon_months
+    if horizon < 3 or horizon > 12:
+        raise ValueError("horizon_months harus antara 3 dan 12.")
+    if any(month < 1 or month > horizon for month in scenario.one_off_expenses):
+        raise ValueError(f"Bulan pengeluaran sekali harus antara 1 dan {horizon}.")
+    paths = settings.scenario_paths if paths is None else paths
+
+    components = np.vstack((inputs.revenue, inputs.expenses))
+    weights = _signed_weights(inputs, scenario)
+    history = weights @ components
+    # Component trends are clipped at zero (no negative revenue or expense) before
+    # they are combined; the bootstrap then resamples the combined history's residuals.
+    trends = np.maximum(forecast_trends(components, np.full(len(components), components.shape[1]), horizon), 0.0)
+    baseline = weights @ trends
+    for month, amount in scenario.one_off_expenses.items():
+        baseline[month - 1] -= amount
+
+    net = bootstrap_paths(history, baseline, paths)
+    starting_cash = inputs.net_total if scenario.starting_cash is None else scenario.starting_cash
+    balance = starting_cash + np.cumsum(net, axis=1)
+    cash_out = np.maximum.accumulate(balance < 0, axis=1)
+
+    net_bands, balance_bands = np.percentile(
+        np.stack((net, balance)), list(INTERVAL_PERCENTILES.values()), axis=1
+    ).round(2).transpose(1, 0, 2)
+    deficit_probability = (net < 0).mean(axis=0).round(4)
+    cash_out_probability = cash_out.mean(axis=0).round(4)
+    months: list[date] = month_starts(inputs.last_month, horizon)
+    return {
+        "scenario_hash": scenario.scenario_hash(),
+        "horizon_months": horizon,
+        "paths": paths,
+        "starting_cash": round(starting_cash, 2),
+        "runway_months": _runway(cash_out, 0.5),
+        "runway_p10_months": _runway(cash_out, 0.1),
+        "cash_out_probability": float(cash_out_probability[-1]),
+        "points": [
+            {
+                "month": month,
+                **dict(zip(INTERVAL_PERCENTILES, net_bands[:, index].tolist(), strict=True)),
+                "deficit_probability": float(deficit_probability[index]),
+                **{
+                    f"balance_{name}": value
+                    for name, value in zip(INTERVAL_PERCENTILES, balance_bands[:, index].tolist(), strict=True)
+                },
+                "cash_out_probability": float(cash_out_probability[index]),
+            }
+            for index, month in enumerate(months)
+        ],
+    }
@@ -0,0 +1,59 @@
+"""Closed-form least-squares trend lines, fitted for many series at once.
+
+Each series is regressed on its month index 0..n-1. With a single feature
+the ordinary least squares solution is
+
+    slope = sum((x - x_mean) * (y - y_mean)) / sum((x - x_mean) ** 2)
+    intercept = y_mean - slope * x_mean
+
+which is what `sklearn.linear_model.LinearRegression` computes for this
+case, without its per-call validation overhead. Series of different lengths
+are right-padded into one matrix and fitted together under a mask.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from app.core.lazy import lazy_module
+
+np = lazy_module("numpy")
+
+
+def pad_series(series: Sequence[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Right-pad 1-D series with zeros into a (len(series), longest) matrix; returns it and the lengths."""
+    lengths = np.fromiter((len(values) for values in series), dtype=np.int64, count=len(series))
+    matrix = np.zeros((len(series), int(lengths.max(initial=0))), dtype=np.float64)
+    for row, values in enumerate(series):
+        matrix[row, : len(values)] = values
+    return matrix, lengths
+
+
+def _row_sums(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Sequential sums up to each row's length: unlike `sum`'s pairwise order they do not
+    # depend on the padded width, so a series gets bit-identical results alone or in a batch.
+    return np.take_along_axis(np.cumsum(values, axis=1), (lengths - 1)[:, None], axis=1)[:, 0]
+
+
+def fit_trends(matrix: np.ndarray, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Slope and intercept per row of a padded matrix; each row needs at least two values."""
+    x = np.arange(matrix.shape[1], dtype=np.float64)
+    n = lengths.astype(np.float64)
+    x_mean = (n - 1) / 2
+    y_mean = _row_sums(matrix, lengths) / n
+    x_centered = x - x_mean[:, None]
+    y_centered = matrix - y_mean[:, None]
+    slope = _row_sums(x_centered * y_centered, lengths) / _row_sums(x_centered * x_centered, lengths)
+    return slope, y_mean - slope * x_mean
+
+
+def forecast_trends(matrix: np.ndarray, lengths: np.ndarray, horizon: int) -> np.ndarray:
+    """Extrapolate each row's trend `horizon` steps past its last value; shape (rows, horizon)."""
+    slope, intercept = fit_trends(matrix, lengths)
+    x_future = lengths[:, None] + np.arange(horizon)
+    return intercept[:, None] + slope[:, None] * x_future
+
+
+def forecast_trend(y: np.ndarray, horizon: int) -> np.ndarray:
+    """`forecast_trends` for a single series."""
+    y = np.asarray(y, dtype=np.float64)
+    return forecast_trends(y[None, :], np.array([len(y)]), horizon)[0]
@@ -0,0 +1,55 @@
+"""Optional background preload of heavy dependencies after startup.
+
+Imports are deferred (see `app.core.lazy`) so the app starts fast; with
+`WARMUP_ON_STARTUP=true` a daemon thread then imports them, and starts the
+forecast pool workers with statsmodels loaded, before the first request that
+needs them arrives. Progress is reported by `GET /health/warmup`.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from typing import Any
+
+from app.core.config import settings
+from app.services import forecast_pool
+
+WARMUP_MODULES = ("numpy", "pandas", "pyarrow", "pyarrow.parquet", "openpyxl")
+FORECAST_WORKER_MODULES = ("app.services.prediction", "statsmodels.tsa.arima.model")
+
+_state: dict[str, Any] = {"status": "idle", "seconds": {}, "error": None}
+_lock = threading.Lock()
+
+
+def _timed(name: str, load) -> None:
+    started = time.perf_counter()
+    load()
+    _state["seconds"][name] = round(time.perf_counter() - started, 3)
+
+
+def warm_up() -> None:
+    """Import heavy modules and start the forecast pool; runs in the warm-up thread."""
+    try:
+        modules = WARMUP_MODULES + (("openai",) if settings.openai_api_key else ())
+        for module in modules:
+            _timed(module, lambda module=module: importlib.import_module(module))
+        _timed("forecast_pool", lambda: forecast_pool.warm_up(FORECAST_WORKER_MODULES))
+    except Exception as exc:
+        _state["error"] = str(exc)
+    _state["status"] = "done"
+
+
+def start_warmup() -> threading.Thread | None:
+    """Start the warm-up thread once; returns None if it already ran or is running."""
+    with _lock:
+        if _state["status"] != "idle":
+            return None
+        _state["status"] = "running"
+    thread = threading.Thread(target=warm_up, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_state() -> dict[str, Any]:
+    return {"status": _state["status"], "seconds": dict(_state["seconds"]), "error": _state["error"]}
@@ -0,0 +1,39 @@
+"""Shared fixtures. Run from the backend root: `python -m pytest tests`."""
+from __future__ import annotations
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="unfinial-tests-")
+# Settings are read when `app` is first imported, so point them at scratch space first.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["UPLOAD_JOB_DIR"] = os.path.join(_TMP, "uploads")
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import Base, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.cache import analytics_cache, forecast_cache  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    # A fresh database reuses user ids and data versions, so cached results must go too.
+    Base.metadata.drop_all(bind=engine)
+    analytics_cache.clear()
+    forecast_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    def _register(email: str = "ani@example.com", password: str = "secret1") -> tuple[int, dict[str, str]]:
+        user = client.post("/users", json={"name": "Ani", "email": email, "password": password})
+        assert user.status_code == 201, user.text
+        token = client.post("/auth/login", json={"email": email, "password": password}).json()["access_token"]
+        return user.json()["id"], {"Authorization": f"Bearer {token}"}
+
+    return _register
@@ -0,0 +1,28 @@
+def add(client, user_id: int, kind: str, amount: float, day: str = "2024-01-05") -> None:
+    transaction = {"user_id": user_id, "type": kind, "category": "penjualan", "amount": amount, "date": day}
+    assert client.post("/transactions/manual", json=transaction).status_code == 201
+
+
+def test_writes_invalidate_cached_summary(client, register):
+    user_id, _ = register()
+    add(client, user_id, "income", 100)
+    assert client.get(f"/dashboard/summary/{user_id}").json()["total_revenue"] == 100
+
+    add(client, user_id, "income", 50)
+    assert client.get(f"/dashboard/summary/{user_id}").json()["total_revenue"] == 150
+
+    csv = b"date,type,category,amount\n2024-01-07,expense,sewa,30\n"
+    client.post(f"/transactions/upload?user_id={user_id}", files={"file": ("a.csv", csv, "text/csv")})
+    assert client.get(f"/dashboard/summary/{user_id}").json()["total_expense"] == 30
+
+
+def test_cache_is_per_user(client, register):
+    ani, _ = register("ani@example.com")
+    budi, _ = register("budi@example.com")
+    add(client, ani, "income", 100)
+    add(client, budi, "income", 70)
+    assert client.get(f"/dashboard/summary/{ani}").json()["total_revenue"] == 100
+    assert client.get(f"/dashboard/summary/{budi}").json()["total_revenue"] == 70
+    add(client, budi, "income", 5)
+    assert client.get(f"/dashboard/summary/{ani}").json()["total_revenue"] == 100
+    assert client.get(f"/dashboard/summary/{budi}").json()["total_revenue"] == 75
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.services import engine, prediction
+from app.services.backtest import BacktestResult
+
+
+def add_months(client, user_id: int, net: list[float]) -> None:
+    for index, amount in enumerate(net):
+        month = date(2023 + index // 12, index % 12 + 1, 5).isoformat()
+        client.post(
+            "/transactions/manual",
+            json={
+                "user_id": user_id,
+                "type": "income",
+                "category": "penjualan",
+                "amount": 1000 + amount,
+                "date": month,
+            },
+        )
+        client.post(
+            "/transactions/manual",
+            json={"user_id": user_id, "type": "expense", "category": "sewa", "amount": 1000, "date": month},
+        )
+
+
+@pytest.fixture
+def inline_fits(monkeypatch):
+    monkeypatch.setattr(settings, "forecast_pool_workers", 0)
+
+
+def test_auto_picks_the_seasonal_model_on_seasonal_history(client, register, inline_fits):
+    user_id, _ = register()
+    add_months(client, user_id, [500 if month % 12 in (10, 11) else 100 + month % 3 for month in range(24)])
+
+    body = client.get(f"/predictions/cash-flow/{user_id}", params={"months": 6, "model": "auto"}).json()
+    assert body["model_used"] == "seasonal_naive"
+    assert body["metrics"]["selected_model"] == "seasonal_naive"
+    assert body["metrics"]["fallback_from"] is None
+    assert body["metrics"]["mae"]["seasonal_naive"] == min(body["metrics"]["mae"].values())
+
+
+def test_metrics_follow_the_fallback_model(client, register, inline_fits, monkeypatch):
+    user_id, _ = register()
+    add_months(client, user_id, [100.0 * month for month in range(12)])
+    mae = {"linear_regression": 20.0, "arima": 10.0}
+    monkeypatch.setattr(engine, "user_backtest", lambda db, uid, horizon: BacktestResult("arima", 6, mae))
+
+    def failing_arima(y, horizon_months):
+        raise TimeoutError
+
+    monkeypatch.setattr(prediction, "_arima_fit", failing_arima)
+
+    body = client.get(f"/predictions/cash-flow/{user_id}", params={"months": 3, "model": "auto"}).json()
+    assert body["model_used"] == "linear_regression"
+    assert body["metrics"] == {"selected_model": "linear_regression", "folds": 6, "mae": mae, "fallback_from": "arima"}
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.analytics import expense_intelligence
+from benchmarks.bench_expense_intelligence import expense_intelligence_loop, synthetic_expenses
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_per_category_loop(seed):
+    rng = np.random.default_rng(seed)
+    df = synthetic_expenses(int(rng.integers(1, 400)), int(rng.integers(1, 60)), seed)
+    assert expense_intelligence(df) == expense_intelligence_loop(df)
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "type": [], "category": [], "amount": []}),
+        synthetic_expenses(5, 10, 0).assign(type="income"),
+        synthetic_expenses(1, 1, 0).assign(type="expense"),
+    ],
+    ids=["empty", "income-only", "single-row"],
+)
+def test_matches_per_category_loop_on_edge_cases(df):
+    assert expense_intelligence(df) == expense_intelligence_loop(df)
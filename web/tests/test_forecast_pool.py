@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.config import settings
+from app.services import forecast_pool
+from app.services.forecast_pool import PoolUnavailable, run_fit
+
+
+def sleep_and_return(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    forecast_pool.shutdown()
+    monkeypatch.setattr(settings, "forecast_pool_workers", 2)
+    monkeypatch.setattr(settings, "forecast_pool_max_queue", 16)
+    forecast_pool.warm_up(("time",))
+    yield
+    forecast_pool.shutdown()
+
+
+def test_timeout_does_not_kill_fits_of_other_requests(pool):
+    with ThreadPoolExecutor(max_workers=2) as requests:
+        stuck = requests.submit(run_fit, sleep_and_return, 30.0, timeout=0.5)
+        healthy = requests.submit(run_fit, sleep_and_return, 1.5, timeout=10)
+        with pytest.raises(PoolUnavailable):
+            stuck.result()
+        assert healthy.result() == 1.5
+
+
+def test_timed_out_pool_is_retired_and_killed_after_draining(pool):
+    old = forecast_pool._pool()
+    old_processes = list(old._processes.values())
+    with pytest.raises(PoolUnavailable):
+        run_fit(sleep_and_return, 30.0, timeout=0.2)
+
+    assert forecast_pool._pool() is not old
+    assert run_fit(sleep_and_return, 0.0) == 0.0
+    for _ in range(50):
+        if not any(process.is_alive() for process in old_processes):
+            break
+        time.sleep(0.1)
+    assert not any(process.is_alive() for process in old_processes)
+    assert forecast_pool.stats()["retiring_pools"] == 0
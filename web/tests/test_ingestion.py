@@ -0,0 +1,84 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.services.ingestion import TYPE_ALIAS, normalize_transactions
+
+
+def normalize_row_by_row(frame: pd.DataFrame) -> tuple[list[tuple], int]:
+    """The row loop `normalize_transactions` replaced."""
+    rows, skipped = [], 0
+    for row in frame.to_dict(orient="records"):
+        tx_type = TYPE_ALIAS.get(str(row.get("type")).strip().lower())
+        if tx_type is None:
+            skipped += 1
+            continue
+        try:
+            amount = float(row.get("amount"))
+            tx_date = pd.to_datetime(row.get("date")).date()
+            category = str(row.get("category")).strip()
+            if amount <= 0 or not category:
+                skipped += 1
+                continue
+        except Exception:
+            skipped += 1
+            continue
+        rows.append((tx_date, tx_type, category, amount))
+    return rows, skipped
+
+
+def normalized(frame: pd.DataFrame) -> tuple[list[tuple], int]:
+    rows, skipped = normalize_transactions(frame)
+    return [
+        (tx_date.date(), tx_type, category, amount)
+        for tx_date, tx_type, category, amount in rows[["date", "type", "category", "amount"]].itertuples(index=False)
+    ], skipped
+
+
+def upload(dates: list[object]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"date": dates, "type": "income", "category": "penjualan", "amount": range(1, len(dates) + 1)}, dtype=object
+    )
+
+
+@pytest.mark.parametrize(
+    "dates",
+    [
+        ["2024-01-05", "2024-01-06", "2024-02-29"],
+        ["2024-01-05", "05/01/2024", "Jan 7 2024", "bukan tanggal"],
+        ["2024-01-05T10:00:00+07:00", "2024-01-06"],
+        ["2024-01-05T23:00:00+07:00", "2024-01-06T01:00:00+00:00", "2024-01-07"],
+        ["2024-01-05T23:00:00+07:00", "2024-01-06T23:00:00+07:00"],
+        ["2024-01-05T23:00:00+07:00", "05/01/2024", "bukan tanggal"],
+        [pd.Timestamp("2024-03-01 12:00"), "2024-03-02", date(2024, 3, 3)],
+    ],
+    ids=["iso", "non-iso", "aware-and-naive", "mixed-offsets", "one-offset", "aware-and-non-iso", "cells"],
+)
+def test_dates_match_row_by_row(dates):
+    assert normalized(upload(dates)) == normalize_row_by_row(upload(dates))
+
+
+def test_offset_keeps_local_calendar_date():
+    rows, skipped = normalized(upload(["2024-01-05T23:30:00+07:00", "2024-01-06"]))
+    assert skipped == 0
+    assert [row[0] for row in rows] == [date(2024, 1, 5), date(2024, 1, 6)]
+
+
+def test_empty_date_is_skipped():
+    # The row loop let NaT through and the whole upload then failed on insert.
+    rows, skipped = normalized(upload(["2024-01-05", None, float("nan")]))
+    assert (len(rows), skipped) == (1, 2)
+
+
+def test_skipped_rows_match_row_by_row():
+    frame = pd.DataFrame(
+        {
+            "date": ["2024-01-05", "2024-01-06", "x", "2024-01-08", "2024-01-09", "2024-01-10"],
+            "type": ["pendapatan", "beban", "income", "bogus", "expense", "income"],
+            "category": ["penjualan", "sewa", "gaji", "x", "  ", "ongkir"],
+            "amount": [100, "abc", 5, 5, 5, -1],
+        },
+        dtype=object,
+    )
+    assert normalized(frame) == normalize_row_by_row(frame)
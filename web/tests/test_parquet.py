@@ -0,0 +1,60 @@
+import io
+from decimal import Decimal
+
+import pyarrow.parquet as pq
+
+CSV = (
+    b"date,type,category,amount,note\n"
+    b"2024-01-05,income,penjualan,100.50,\n"
+    b"2024-01-05,income,penjualan,100.50,\n"
+    b"2024-02-10,expense,sewa,40,bulan februari\n"
+    b"2024-03-15,expense,listrik,12.25,\n"
+)
+
+
+def export(client, headers, **params) -> bytes:
+    response = client.get("/transactions/export.parquet", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def upload_parquet(client, headers, content: bytes) -> dict:
+    files = {"file": ("export.parquet", content, "application/octet-stream")}
+    response = client.post("/transactions/upload/me", files=files, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_export_reuploads_without_new_rows(client, register):
+    _, headers = register()
+    client.post("/transactions/upload/me", files={"file": ("a.csv", CSV, "text/csv")}, headers=headers)
+
+    content = export(client, headers)
+    table = pq.read_table(io.BytesIO(content))
+    assert table.num_rows == 4
+    assert table.column("amount").to_pylist()[:2] == [Decimal("100.50")] * 2
+    assert table.column("note").to_pylist()[2] == "bulan februari"
+
+    reupload = upload_parquet(client, headers, content)
+    assert (reupload["inserted_rows"], reupload["duplicate_rows"], reupload["skipped_rows"]) == (0, 4, 0)
+    assert len(client.get("/transactions", headers=headers).json()) == 4
+
+
+def test_parquet_upload_into_another_account(client, register):
+    _, ani = register("ani@example.com")
+    _, budi = register("budi@example.com")
+    client.post("/transactions/upload/me", files={"file": ("a.csv", CSV, "text/csv")}, headers=ani)
+
+    assert upload_parquet(client, budi, export(client, ani))["inserted_rows"] == 4
+    summary = client.get("/dashboard/summary", headers=budi).json()
+    assert (summary["total_revenue"], summary["total_expense"]) == (201.0, 52.25)
+
+
+def test_export_date_filter(client, register):
+    _, headers = register()
+    client.post("/transactions/upload/me", files={"file": ("a.csv", CSV, "text/csv")}, headers=headers)
+
+    table = pq.read_table(io.BytesIO(export(client, headers, start_date="2024-02-01", end_date="2024-02-29")))
+    assert table.column("category").to_pylist() == ["sewa"]
+    assert pq.read_table(io.BytesIO(export(client, headers, start_date="2025-01-01"))).num_rows == 0
+    assert client.get("/transactions/export.parquet").status_code == 401
@@ -0,0 +1,98 @@
+import datetime as dt
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models import Prediction, PredictionRun, PredictionRunPoint
+from app.services.prediction_history import compact_prediction_history, record_prediction_run
+
+
+def add_month(client, user_id: int, month: date, revenue: float, expense: float) -> None:
+    for kind, category, amount in (("income", "penjualan", revenue), ("expense", "sewa", expense)):
+        response = client.post(
+            "/transactions/manual",
+            json={"user_id": user_id, "type": kind, "category": category, "amount": amount, "date": month.isoformat()},
+        )
+        assert response.status_code == 201, response.text
+
+
+def run_count(user_id: int) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(PredictionRun).where(PredictionRun.user_id == user_id))
+
+
+def test_repeated_requests_record_one_run(client, register):
+    user_id, _ = register()
+    for month, revenue in enumerate((1000, 1200, 1100, 1500), start=1):
+        add_month(client, user_id, date(2024, month, 5), revenue, 800)
+
+    for _ in range(3):
+        assert client.get(f"/predictions/cash-flow/{user_id}", params={"months": 3}).status_code == 200
+    assert run_count(user_id) == 1
+
+    add_month(client, user_id, date(2024, 5, 5), 2000, 800)
+    client.get(f"/predictions/cash-flow/{user_id}", params={"months": 3})
+    assert run_count(user_id) == 2
+
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(Prediction)) == 0
+
+
+def test_unchanged_forecast_at_a_new_version_is_not_recorded(client, register):
+    user_id, _ = register()
+    points = [
+        {"month": date(2024, 6, 1), "predicted_cash_flow": 150.5},
+        {"month": date(2024, 7, 1), "predicted_cash_flow": 99.0},
+    ]
+    with SessionLocal() as db:
+        assert record_prediction_run(db, user_id, 1, "linear_regression", points, 0)
+        assert not record_prediction_run(db, user_id, 1, "linear_regression", points, 0)
+        assert not record_prediction_run(db, user_id, 2, "linear_regression", points, 0)
+        changed = [points[0], {**points[1], "predicted_cash_flow": 98.0}]
+        assert record_prediction_run(db, user_id, 3, "linear_regression", changed, 1)
+        db.commit()
+    assert run_count(user_id) == 2
+
+
+def test_compaction_collapses_duplicates(client, register):
+    user_id, _ = register()
+    with SessionLocal() as db:
+        for version, value in ((1, "10.00"), (2, "10.00"), (3, "12.00"), (4, "12.00")):
+            db.add(
+                PredictionRun(
+                    user_id=user_id,
+                    model_type="linear_regression",
+                    horizon_months=1,
+                    data_version=version,
+                    deficit_risk_months=0,
+                    points=[PredictionRunPoint(month=date(2024, 6, 1), predicted_value=Decimal(value))],
+                )
+            )
+        for _ in range(3):
+            db.add(Prediction(user_id=user_id, month=date(2024, 6, 1), predicted_value=Decimal("10.00")))
+        db.add(
+            PredictionRun(
+                user_id=user_id,
+                model_type="arima",
+                horizon_months=1,
+                data_version=1,
+                deficit_risk_months=0,
+                created_at=dt.datetime.utcnow() - dt.timedelta(days=30),
+                points=[PredictionRunPoint(month=date(2024, 6, 1), predicted_value=Decimal("5.00"))],
+            )
+        )
+        db.commit()
+
+        result = compact_prediction_history(db, keep_days=7)
+        db.commit()
+        assert (result.duplicate_runs, result.expired_runs, result.legacy_rows) == (2, 0, 2)
+        versions = db.scalars(
+            select(PredictionRun.data_version)
+            .where(PredictionRun.model_type == "linear_regression")
+            .order_by(PredictionRun.data_version)
+        ).all()
+        assert versions == [1, 3]
+        # The newest run of each (user, model, horizon) survives expiry.
+        assert run_count(user_id) == 3
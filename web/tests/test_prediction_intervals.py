@@ -0,0 +1,123 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services import prediction
+from app.services.prediction import FORECASTERS, INTERVALS_UNAVAILABLE, add_intervals, bootstrap_paths
+
+
+def random_walk(months: int, seed: int = 0) -> np.ndarray:
+    return 1000 + np.cumsum(np.random.default_rng(seed).normal(0, 100, months))
+
+
+@pytest.fixture(autouse=True)
+def inline_fits(monkeypatch):
+    monkeypatch.setattr(settings, "forecast_pool_workers", 0)
+
+
+@pytest.mark.parametrize("model", sorted(FORECASTERS))
+def test_bands_surround_each_models_forecast(model):
+    y = random_walk(36)
+    forecaster, _ = FORECASTERS[model]
+    points = [{"month": date(2026, 1, 1), "predicted_cash_flow": float(v)} for v in forecaster(y, 6)]
+    arima = prediction._arima_fit(y, 6)[1] if model == "arima" else None
+
+    banded = add_intervals(y, points, model, paths=2000, arima=arima)
+    assert banded is not None
+    for point in banded:
+        assert point["p10"] <= point["p50"] <= point["p90"]
+        assert 0.0 <= point["deficit_probability"] <= 1.0
+    assert add_intervals(y, points, model, paths=2000, arima=arima) == banded
+
+
+def test_arima_bands_need_the_fits_residuals():
+    y = random_walk(24)
+    points = [{"month": date(2026, 1, 1), "predicted_cash_flow": float(v)} for v in FORECASTERS["arima"][0](y, 3)]
+    assert add_intervals(y, points, "arima") is None
+
+
+def test_random_walk_bands_widen_with_the_horizon():
+    y = random_walk(36)
+    simulated = bootstrap_paths(y, FORECASTERS["naive"][0](y, 12), 4000, "naive")
+    spread = np.percentile(simulated, 90, axis=0) - np.percentile(simulated, 10, axis=0)
+    assert spread[-1] > 2 * spread[0]
+
+
+def test_bands_use_the_models_own_residuals():
+    # A perfectly seasonal series has no year-over-year error, but a large trend residual.
+    y = np.tile([100.0, 900.0, 300.0, 700.0, 200.0, 800.0, 400.0, 600.0, 500.0, 50.0, 950.0, 450.0], 2)
+    seasonal = bootstrap_paths(y, FORECASTERS["seasonal_naive"][0](y, 6), 500, "seasonal_naive")
+    trend = bootstrap_paths(y, FORECASTERS["seasonal_naive"][0](y, 6), 500, "linear_regression")
+    assert np.ptp(seasonal, axis=0).max() == 0
+    assert np.ptp(trend, axis=0).min() > 100
+
+
+def test_seasonal_model_without_a_full_extra_year_has_no_bands():
+    y = random_walk(12)
+    assert bootstrap_paths(y, y[:3], 100, "seasonal_naive") is None
+
+
+def add_history(client, user_id: int) -> None:
+    for month, amount in enumerate(random_walk(12).round(2), start=1):
+        client.post(
+            "/transactions/manual",
+            json={
+                "user_id": user_id,
+                "type": "income",
+                "category": "penjualan",
+                "amount": float(amount),
+                "date": f"2024-{month:02d}-05",
+            },
+        )
+
+
+@pytest.fixture
+def arima_fits(monkeypatch):
+    calls = []
+    fit = prediction._arima_fit
+
+    def counting_fit(y, horizon_months):
+        calls.append(horizon_months)
+        return fit(y, horizon_months)
+
+    monkeypatch.setattr(prediction, "_arima_fit", counting_fit)
+    return calls
+
+
+def test_arima_intervals_take_one_fit(client, register, arima_fits):
+    user_id, _ = register()
+    add_history(client, user_id)
+
+    body = client.get(f"/predictions/cash-flow/{user_id}", params={"model": "arima", "intervals": True}).json()
+    assert body["model_used"] == "arima"
+    assert body["points"][0]["p10"] is not None
+    assert len(arima_fits) == 1
+
+    plain = client.get(f"/predictions/cash-flow/{user_id}", params={"model": "arima"}).json()
+    assert [point["predicted_cash_flow"] for point in plain["points"]] == [
+        point["predicted_cash_flow"] for point in body["points"]
+    ]
+    assert plain["points"][0]["p10"] is None
+    assert len(arima_fits) == 1
+
+
+def test_response_says_when_bands_are_unavailable(client, register, monkeypatch):
+    user_id, _ = register()
+    add_history(client, user_id)
+    # The point forecast is cached; the refit for its residuals then fails.
+    client.get(f"/predictions/cash-flow/{user_id}", params={"model": "arima"})
+
+    def failing_fit(y, horizon_months):
+        raise TimeoutError
+
+    monkeypatch.setattr(prediction, "_arima_fit", failing_fit)
+    body = client.get(f"/predictions/cash-flow/{user_id}", params={"model": "arima", "intervals": True}).json()
+    assert body["model_used"] == "arima"
+    assert body["intervals_message"] == INTERVALS_UNAVAILABLE
+    assert body["points"][0]["p10"] is None
+
+    linear = client.get(f"/predictions/cash-flow/{user_id}", params={"intervals": True}).json()
+    assert linear["intervals_message"] is None
+    assert linear["points"][0]["p10"] is not None
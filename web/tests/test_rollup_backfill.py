@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import MonthlyRollup
+from app.services.cache import analytics_cache
+from app.services.rollup import backfill_rollup, verify_rollup
+
+
+def add(client, user_id: int, kind: str, amount: float) -> None:
+    transaction = {"user_id": user_id, "type": kind, "category": "penjualan", "amount": amount, "date": "2024-01-05"}
+    assert client.post("/transactions/manual", json=transaction).status_code == 201
+
+
+def test_startup_backfills_users_without_rollup(client, register):
+    ani, _ = register("ani@example.com")
+    budi, _ = register("budi@example.com")
+    add(client, ani, "income", 100)
+    add(client, budi, "income", 70)
+    # Ani's transactions predate the rollup table.
+    with SessionLocal() as db:
+        db.execute(delete(MonthlyRollup).where(MonthlyRollup.user_id == ani))
+        db.commit()
+    analytics_cache.clear()
+
+    with TestClient(app) as restarted:
+        assert restarted.get(f"/dashboard/summary/{ani}").json()["total_revenue"] == 100
+        assert restarted.get(f"/dashboard/summary/{budi}").json()["total_revenue"] == 70
+    with SessionLocal() as db:
+        assert verify_rollup(db) == []
+        assert backfill_rollup(db) == 0
@@ -0,0 +1,87 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.scenario import Scenario, ScenarioInputs, simulate_scenario
+
+
+def flat_inputs(months: int = 6) -> ScenarioInputs:
+    return ScenarioInputs(
+        last_month=pd.Timestamp(2024, months, 1),
+        revenue=np.full(months, 1000.0),
+        categories=["gaji", "sewa"],
+        expenses=np.vstack((np.full(months, 500.0), np.full(months, 300.0))),
+    )
+
+
+def test_flat_history_has_no_spread():
+    result = simulate_scenario(flat_inputs(), Scenario(horizon_months=3), paths=200)
+    assert result["starting_cash"] == 1200.0
+    assert result["runway_months"] is None
+    assert [point["month"] for point in result["points"]] == [date(2024, 7, 1), date(2024, 8, 1), date(2024, 9, 1)]
+    for month, point in enumerate(result["points"], start=1):
+        assert point["p10"] == point["p50"] == point["p90"] == pytest.approx(200.0)
+        assert point["balance_p50"] == pytest.approx(1200.0 + 200.0 * month)
+        assert point["deficit_probability"] == 0.0
+
+
+def test_changes_reweight_the_components():
+    scenario = Scenario(
+        horizon_months=3,
+        revenue_change_pct=10,
+        expense_change_pct=-50,
+        category_changes={"sewa": 100},
+        one_off_expenses={2: 1000.0},
+    )
+    points = simulate_scenario(flat_inputs(), scenario, paths=200)["points"]
+    # 1100 revenue - 250 gaji - 300 sewa (halved, then doubled).
+    assert [point["p50"] for point in points] == pytest.approx([550.0, -450.0, 550.0])
+    assert [point["deficit_probability"] for point in points] == [0.0, 1.0, 0.0]
+
+
+def test_no_revenue_runs_out_of_cash():
+    result = simulate_scenario(flat_inputs(), Scenario(revenue_change_pct=-100, starting_cash=1000.0), paths=200)
+    assert result["runway_months"] == 2
+    assert result["cash_out_probability"] == 1.0
+    assert [point["cash_out_probability"] for point in result["points"]][:2] == [0.0, 1.0]
+
+
+def test_equal_scenarios_share_a_hash():
+    first = Scenario(category_changes={"sewa": 5.0, "gaji": -5.0}, one_off_expenses={1: 10.0, 3: 20.0})
+    second = Scenario(category_changes={"gaji": -5.0, "sewa": 5.0}, one_off_expenses={3: 20.0, 1: 10.0})
+    assert first.scenario_hash() == second.scenario_hash()
+    assert first.scenario_hash() != Scenario(category_changes={"sewa": 5.0}).scenario_hash()
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    [
+        Scenario(horizon_months=2),
+        Scenario(horizon_months=3, one_off_expenses={4: 1.0}),
+        Scenario(category_changes={"x": 1}),
+    ],
+)
+def test_invalid_scenarios_are_rejected(scenario):
+    with pytest.raises(ValueError):
+        simulate_scenario(flat_inputs(), scenario, paths=10)
+
+
+def test_endpoint(client, register):
+    user_id, headers = register()
+    assert client.post("/predictions/scenarios", json={}, headers=headers).status_code == 400
+    for month in range(1, 7):
+        for kind, category, amount in (("income", "penjualan", 1000 + 50 * month), ("expense", "sewa", 600)):
+            transaction = {"type": kind, "category": category, "amount": amount, "date": f"2024-{month:02d}-05"}
+            client.post("/transactions/manual", json={"user_id": user_id, **transaction})
+
+    body = {"months": 4, "category_changes": [{"category": " sewa ", "change_pct": 20}]}
+    response = client.post("/predictions/scenarios", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == client.post(f"/predictions/scenarios/{user_id}", json=body).json()
+    assert len(response.json()["points"]) == 4
+
+    unknown = {"category_changes": [{"category": "listrik", "change_pct": 20}]}
+    assert client.post("/predictions/scenarios", json=unknown, headers=headers).status_code == 400
+    assert client.post("/predictions/scenarios/999", json={}).status_code == 404
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+
+VALID = {"type": "income", "category": "penjualan", "amount": 100, "date": "2024-01-05"}
+INVALID = {"type": "refund", "category": "penjualan", "amount": -1, "date": "2024-01-05"}
+
+
+def post_ndjson(client, headers, lines: list[bytes]):
+    return client.post(
+        "/transactions/batch",
+        content=b"\n".join(lines),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+
+
+def test_json_array_reports_each_item(client, register):
+    _, headers = register()
+    response = client.post("/transactions/batch", json=[VALID, INVALID, {**VALID, "amount": 5}], headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["received"], body["created"], body["invalid"]) == (3, 2, 1)
+    assert [item["status"] for item in body["items"]] == ["created", "invalid", "created"]
+    assert body["items"][1]["errors"]
+    assert body["items"][0]["id"] is not None
+    assert len(client.get("/transactions", headers=headers).json()) == 2
+
+
+def test_ndjson_skips_blank_lines_and_reports_invalid_json(client, register):
+    _, headers = register()
+    response = post_ndjson(client, headers, [json.dumps(VALID).encode(), b"", b"{not json", json.dumps(VALID).encode()])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["received"], body["created"], body["invalid"]) == (3, 2, 1)
+    assert [item["index"] for item in body["items"] if item["status"] == "invalid"] == [1]
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_more_items_than_allowed_is_rejected(client, register, monkeypatch, ndjson):
+    _, headers = register()
+    monkeypatch.setattr(settings, "transaction_batch_max_items", 2)
+    if ndjson:
+        response = post_ndjson(client, headers, [json.dumps(VALID).encode()] * 3)
+    else:
+        response = client.post("/transactions/batch", json=[VALID] * 3, headers=headers)
+    assert response.status_code == 413
+    assert client.get("/transactions", headers=headers).json() == []
+
+
+def test_oversized_body_is_rejected_before_parsing(client, register, monkeypatch):
+    _, headers = register()
+    monkeypatch.setattr(settings, "transaction_batch_max_items", 2)
+    response = client.post("/transactions/batch", json=[{**VALID, "note": "x" * 4096}], headers=headers)
+    assert response.status_code == 413
+    assert "byte" in response.json()["detail"]
+
+    def chunks():
+        yield b"["
+        for _ in range(10):
+            yield json.dumps({**VALID, "note": "x" * 512}).encode() + b","
+        yield b"]"
+
+    streamed = client.post("/transactions/batch", content=chunks(), headers=headers)
+    assert streamed.status_code == 413
+
+
+def test_empty_and_malformed_bodies(client, register):
+    _, headers = register()
+    assert client.post("/transactions/batch", json=[], headers=headers).status_code == 400
+    assert client.post("/transactions/batch", json={"type": "income"}, headers=headers).status_code == 400
+    assert client.post("/transactions/batch", json=[VALID]).status_code == 401
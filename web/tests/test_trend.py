@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.services.trend import fit_trends, forecast_trend, forecast_trends, pad_series
+
+
+def test_fit_matches_least_squares():
+    rng = np.random.default_rng(7)
+    for months in (2, 3, 12, 37):
+        y = rng.normal(1000, 300, months).cumsum()
+        slope, intercept = np.polyfit(np.arange(months), y, 1)
+        fitted_slope, fitted_intercept = fit_trends(y[None, :], np.array([months]))
+        np.testing.assert_allclose([fitted_slope[0], fitted_intercept[0]], [slope, intercept], rtol=1e-9)
+
+
+def test_batch_is_bit_identical_to_single_series():
+    rng = np.random.default_rng(11)
+    series = [rng.normal(500, 200, months) for months in (2, 5, 24, 9)]
+    matrix, lengths = pad_series(series)
+    batch = forecast_trends(matrix, lengths, 6)
+    for row, y in enumerate(series):
+        assert np.array_equal(batch[row], forecast_trend(y, 6))
+
+
+def test_forecast_continues_a_straight_line():
+    np.testing.assert_allclose(forecast_trend(np.array([10.0, 20.0, 30.0]), 3), [40.0, 50.0, 60.0])
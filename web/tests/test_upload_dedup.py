@@ -0,0 +1,50 @@
+HEADER = b"date,type,category,amount\n"
+ROWS = [b"2024-01-05,income,penjualan,100\n", b"2024-01-05,income,penjualan,100\n", b"2024-01-06,expense,sewa,40\n"]
+
+
+def upload(client, headers, rows, name="a.csv"):
+    files = {"file": (name, HEADER + b"".join(rows), "text/csv")}
+    response = client.post("/transactions/upload/me", files=files, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def transaction_count(client, headers) -> int:
+    return len(client.get("/transactions", params={"limit": 500}, headers=headers).json())
+
+
+def test_reupload_inserts_nothing(client, register):
+    _, headers = register()
+    first = upload(client, headers, ROWS)
+    # Identical rows within one file are distinct transactions.
+    assert (first["inserted_rows"], first["duplicate_rows"]) == (3, 0)
+
+    again = upload(client, headers, ROWS, name="copy.csv")
+    assert again["inserted_rows"] == 0
+    assert transaction_count(client, headers) == 3
+
+
+def test_overlapping_upload_inserts_only_new_rows(client, register):
+    _, headers = register()
+    upload(client, headers, ROWS[:2])
+    overlap = upload(client, headers, [b"2024-01-07,income,penjualan,70\n", *ROWS])
+    assert (overlap["inserted_rows"], overlap["duplicate_rows"]) == (2, 2)
+    assert transaction_count(client, headers) == 4
+
+
+def test_uploads_of_different_users_do_not_collide(client, register):
+    _, ani = register("ani@example.com")
+    _, budi = register("budi@example.com")
+    upload(client, ani, ROWS)
+    assert upload(client, budi, ROWS)["inserted_rows"] == 3
+
+
+def test_reupload_of_a_file_with_invalid_rows_counts_only_stored_rows(client, register):
+    _, headers = register()
+    rows = [*ROWS, b"2024-01-07,refund,penjualan,10\n", b"bukan-tanggal,income,penjualan,10\n"]
+    first = upload(client, headers, rows)
+    assert (first["inserted_rows"], first["skipped_rows"], first["duplicate_rows"]) == (3, 2, 0)
+
+    again = upload(client, headers, rows)
+    assert (again["inserted_rows"], again["skipped_rows"], again["duplicate_rows"]) == (0, 2, 3)
+    assert "2 baris tidak valid" in again["message"]
@@ -0,0 +1,88 @@
+import datetime as dt
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models import IngestionJob
+from app.services.ingestion_jobs import WORKER_ID, create_job, run_job
+
+CSV = b"date,type,category,amount\n2024-01-05,income,penjualan,100\n2024-01-06,expense,sewa,40\n"
+
+
+def wait_for(client, path, **kwargs):
+    for _ in range(200):
+        job = client.get(path, **kwargs).json()
+        if job["status"] in {"done", "failed"}:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {path} did not finish")
+
+
+def test_owner_reads_job_status(client, register):
+    user_id, headers = register()
+    job = client.post("/transactions/upload/me/jobs", files={"file": ("a.csv", CSV, "text/csv")}, headers=headers)
+    assert job.status_code == 202, job.text
+    job_id = job.json()["id"]
+
+    done = wait_for(client, f"/transactions/upload/me/jobs/{job_id}", headers=headers)
+    assert done["status"] == "done"
+    assert client.get(f"/transactions/upload/jobs/{job_id}", params={"user_id": user_id}).json() == done
+
+
+def test_job_of_another_user_is_not_found(client, register):
+    owner_id, owner_headers = register("ani@example.com")
+    other_id, other_headers = register("budi@example.com")
+    job_id = client.post(
+        "/transactions/upload/me/jobs", files={"file": ("a.csv", CSV, "text/csv")}, headers=owner_headers
+    ).json()["id"]
+    wait_for(client, f"/transactions/upload/me/jobs/{job_id}", headers=owner_headers)
+
+    assert client.get(f"/transactions/upload/me/jobs/{job_id}", headers=other_headers).status_code == 404
+    assert client.get(f"/transactions/upload/jobs/{job_id}", params={"user_id": other_id}).status_code == 404
+    assert client.get(f"/transactions/upload/me/jobs/{job_id}").status_code == 401
+    assert client.get(f"/transactions/upload/jobs/{job_id}").status_code == 422
+
+
+def queued_job(user_id: int) -> int:
+    with SessionLocal() as db:
+        return create_job(db, user_id, io.BytesIO(CSV), "a.csv").id
+
+
+def test_concurrent_runs_of_one_job_ingest_it_once(client, register):
+    user_id, headers = register()
+    job_id = queued_job(user_id)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(run_job, [job_id] * 4))
+
+    with SessionLocal() as db:
+        job = db.get(IngestionJob, job_id)
+        assert (job.status, job.inserted_rows, job.claimed_by) == ("done", 2, WORKER_ID)
+    assert len(client.get("/transactions", headers=headers).json()) == 2
+
+
+def test_running_job_is_taken_over_only_when_stale(client, register):
+    user_id, _ = register()
+    job_id = queued_job(user_id)
+    with SessionLocal() as db:
+        db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(status="running", claimed_by="other:1", heartbeat_at=dt.datetime.utcnow())
+        )
+        db.commit()
+
+        run_job(job_id)
+        db.expire_all()
+        assert db.get(IngestionJob, job_id).status == "running"
+
+        stale = dt.datetime.utcnow() - dt.timedelta(seconds=settings.upload_job_lease_seconds + 1)
+        db.execute(update(IngestionJob).where(IngestionJob.id == job_id).values(heartbeat_at=stale))
+        db.commit()
+        run_job(job_id)
+        db.expire_all()
+        assert db.get(IngestionJob, job_id).status == "done"
@@ -0,0 +1,84 @@
+import io
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from app.core.config import settings
+
+
+def workbook() -> bytes:
+    book = Workbook()
+    summary = book.active
+    summary.title = "Ringkasan"
+    summary.append(["Laporan bulanan"])
+    summary.append(["Date", "Type", "Category", "Amount"])
+    summary.append([datetime(2024, 1, 5), "income", "penjualan", 999])
+
+    detail = book.create_sheet("Transaksi Januari")
+    detail.append(["Laporan Keuangan Toko Ani"])
+    detail.append(["Periode: Januari 2024"])
+    detail.append([])
+    detail.append(["Date", "Type", "Category", "Amount", "Note"])
+    detail.append([datetime(2024, 1, 5), "income", "penjualan", 100, None])
+    detail.append([None, None, None, None, None])
+    detail.append(["2024-01-06", "pengeluaran", "sewa", 40.5, "bayar sewa"])
+    detail.append([datetime(2024, 1, 7), "income", "penjualan", "bukan angka", None])
+
+    out = io.BytesIO()
+    book.save(out)
+    return out.getvalue()
+
+
+def upload(client, headers, content: bytes, sheet: str | None = None):
+    files = {"file": ("laporan.xlsx", content, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    params = {"sheet": sheet} if sheet is not None else {}
+    return client.post("/transactions/upload/me", files=files, params=params, headers=headers)
+
+
+def test_header_below_title_rows_on_a_chosen_sheet(client, register):
+    _, headers = register()
+    response = upload(client, headers, workbook(), sheet="Transaksi Januari")
+    assert response.status_code == 200, response.text
+    assert (response.json()["inserted_rows"], response.json()["skipped_rows"]) == (2, 1)
+
+    transactions = client.get("/transactions", headers=headers).json()
+    assert sorted((row["date"], row["type"], row["category"], row["amount"]) for row in transactions) == [
+        ("2024-01-05", "income", "penjualan", 100.0),
+        ("2024-01-06", "expense", "sewa", 40.5),
+    ]
+
+
+def test_first_sheet_is_the_default(client, register):
+    _, headers = register()
+    response = upload(client, headers, workbook())
+    assert response.status_code == 200, response.text
+    assert response.json()["inserted_rows"] == 1
+    assert [row["amount"] for row in client.get("/transactions", headers=headers).json()] == [999.0]
+
+
+def test_sheet_without_a_header_is_rejected(client, register):
+    _, headers = register()
+    book = Workbook()
+    book.active.append(["Tanggal", "Jenis", "Kategori", "Jumlah"])
+    book.active.append([datetime(2024, 1, 5), "income", "penjualan", 1])
+    content = io.BytesIO()
+    book.save(content)
+    response = upload(client, headers, content.getvalue())
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Kolom wajib: date, type, category, amount"
+
+
+def test_missing_sheet_is_rejected(client, register):
+    _, headers = register()
+    response = upload(client, headers, workbook(), sheet="Februari")
+    assert response.status_code == 400
+    assert "Sheet 'Februari' tidak ditemukan" in response.json()["detail"]
+    assert "Transaksi Januari" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 1000])
+def test_chunking_does_not_change_the_result(client, register, monkeypatch, chunk_rows):
+    _, headers = register()
+    monkeypatch.setattr(settings, "upload_chunk_rows", chunk_rows)
+    assert upload(client, headers, workbook(), sheet="Transaksi Januari").json()["inserted_rows"] == 2